@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+import config
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a provider is saturated and the request should be retried later.
+    """
+
+    def __init__(self, provider: str, reason: str, retry_after: int):
+        super().__init__(f"{provider} is saturated: {reason}.")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class ProviderLimiter:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one inference provider.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout_seconds: float,
+    ):
+        self.provider = provider
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._admitted = 0
+        self._rejected = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._hold_seconds_avg = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def is_saturated(self) -> bool:
+        return self.in_flight >= self.max_concurrency and self.queued >= self.max_queue
+
+    def retry_after(self) -> int:
+        # Expected time for the queue ahead to drain, from the average slot hold time
+        if self._hold_seconds_avg <= 0:
+            return max(1, int(config.ADMISSION_RETRY_AFTER_SECONDS))
+
+        waves = (self.queued + 1) / self.max_concurrency
+        return max(1, int(math.ceil(self._hold_seconds_avg * waves)))
+
+    def reject(self, reason: str) -> AdmissionRejected:
+        self._rejected += 1
+        logger.warning(f"Rejecting {self.provider} request: {reason}.")
+        return AdmissionRejected(self.provider, reason, self.retry_after())
+
+    def try_acquire(self) -> bool:
+        """
+        Take a slot only if one is free right now, without queueing.
+        """
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self._record_admission(0.0)
+            return True
+        return False
+
+    async def acquire(self) -> float:
+        """
+        Take a slot, waiting in the queue if needed. Returns the time spent waiting.
+        """
+        started = time.monotonic()
+
+        if self.try_acquire():
+            return 0.0
+
+        if self.queued >= self.max_queue:
+            raise self.reject("wait queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            raise self.reject("timed out in the wait queue")
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+        waited = time.monotonic() - started
+        self._record_admission(waited)
+        return waited
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as the wait ended; pass it on
+            self.release()
+        else:
+            waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _record_admission(self, waited: float) -> None:
+        self._admitted += 1
+        self._wait_seconds_total += waited
+        self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+    def release(self, held_seconds: float = 0.0) -> None:
+        if held_seconds > 0:
+            alpha = 0.2
+            self._hold_seconds_avg = (
+                held_seconds
+                if self._hold_seconds_avg <= 0
+                else (1 - alpha) * self._hold_seconds_avg + alpha * held_seconds
+            )
+
+        # Hand the slot straight to the next live waiter so queued requests stay FIFO
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self.in_flight = max(0, self.in_flight - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "wait_seconds_total": round(self._wait_seconds_total, 6),
+            "wait_seconds_max": round(self._wait_seconds_max, 6),
+            "hold_seconds_avg": round(self._hold_seconds_avg, 6),
+        }
+
+
+_limiters = {
+    "llama-server": ProviderLimiter(
+        "llama-server",
+        max_concurrency=config.LLAMA_MAX_CONCURRENCY,
+        max_queue=config.LLAMA_MAX_QUEUE,
+        queue_timeout_seconds=config.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ),
+    "groq": ProviderLimiter(
+        "groq",
+        max_concurrency=config.GROQ_MAX_CONCURRENCY,
+        max_queue=config.GROQ_MAX_QUEUE,
+        queue_timeout_seconds=config.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ),
+}
+
+
+def get_limiter(use_local: bool) -> ProviderLimiter:
+    return _limiters["llama-server" if use_local else "groq"]
+
+
+def admission_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
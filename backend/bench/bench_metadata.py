@@ -0,0 +1,87 @@
+"""
+Compare yt-dlp metadata lookup paths against live YouTube (needs network access).
+
+    baseline  a new YoutubeDL per call with full format resolution (the old behaviour)
+    full      the reused per-thread YoutubeDL with full format resolution
+    fast      the reused fast path (no watch page, player JS or format processing)
+
+Run from the backend directory:
+
+    python bench/bench_metadata.py --runs 3 https://www.youtube.com/watch?v=jNQXAC9IVRw
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp  # noqa: E402
+
+import transcript_extractor  # noqa: E402
+
+DEFAULT_URLS = [
+    "https://www.youtube.com/watch?v=jNQXAC9IVRw",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+]
+
+
+def _baseline(video_url: str) -> dict:
+    with yt_dlp.YoutubeDL(transcript_extractor._FULL_METADATA_OPTS) as ydl:
+        info = ydl.extract_info(video_url, download=False) or {}
+    return transcript_extractor._metadata_from_info(info)
+
+
+def _full(video_url: str) -> dict:
+    return transcript_extractor._fetch_video_metadata_full(yt_dlp, video_url)
+
+
+def _fast(video_url: str) -> dict:
+    return transcript_extractor._fetch_video_metadata_fast(yt_dlp, video_url) or {}
+
+
+PATHS = {"baseline": _baseline, "full": _full, "fast": _fast}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="yt-dlp metadata path benchmark.")
+    parser.add_argument("urls", nargs="*", default=DEFAULT_URLS)
+    parser.add_argument("--runs", type=int, default=3, help="Timed calls per URL and path.")
+    args = parser.parse_args()
+
+    timings = {name: [] for name in PATHS}
+    mismatches = 0
+
+    for video_url in args.urls:
+        # One untimed call per reused path so instance setup is not counted against it
+        reference = _full(video_url)
+        _fast(video_url)
+
+        for _ in range(max(1, args.runs)):
+            for name, fetch in PATHS.items():
+                started = time.perf_counter()
+                metadata = fetch(video_url)
+                timings[name].append(time.perf_counter() - started)
+
+                if metadata != reference:
+                    mismatches += 1
+                    print(f"{name} differs for {video_url}: {metadata} != {reference}")
+
+    print(f"{'path':<10}{'calls':>7}{'mean s':>10}{'p50 s':>10}{'max s':>10}")
+    for name, values in timings.items():
+        print(
+            f"{name:<10}{len(values):>7}{statistics.mean(values):>10.3f}"
+            f"{statistics.median(values):>10.3f}{max(values):>10.3f}"
+        )
+
+    baseline_mean = statistics.mean(timings["baseline"])
+    fast_mean = statistics.mean(timings["fast"])
+    if fast_mean > 0:
+        print(f"fast path speedup over baseline: {baseline_mean / fast_mean:.1f}x")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Stand-in llama-server for offline benchmarks.
+
+Serves an OpenAI-compatible streaming /v1/chat/completions (also mounted
+under /openai/v1 so the Groq client can be pointed at it) with a configurable
+time-to-first-token and token rate.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# Short common words so the output is roughly one model token per word
+_WORDS = ["the", "video", "explains", "how", "this", "model", "works", "and", "why", "it", "matters"]
+
+
+def _event(model: str, delta: dict, finish_reason) -> str:
+    chunk = {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def create_app(
+    ttft_seconds: float = 0.2,
+    tokens_per_second: float = 50.0,
+    output_tokens: int = 200,
+) -> FastAPI:
+    """
+    Build the fake server. Each completion streams `output_tokens` words (capped by
+    the request's max_tokens) after `ttft_seconds`, at `tokens_per_second`.
+    """
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.post("/v1/chat/completions")
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+
+        model = body.get("model") or "fake"
+        limit = body.get("max_tokens") or body.get("max_completion_tokens") or output_tokens
+        tokens = max(1, min(output_tokens, int(limit)))
+        interval = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+
+        async def events():
+            await asyncio.sleep(ttft_seconds)
+            started = time.monotonic()
+
+            for index in range(tokens):
+                yield _event(model, {"content": _WORDS[index % len(_WORDS)] + " "}, None)
+
+                # Pace against the start time so scheduler jitter does not lower the rate
+                delay = started + (index + 1) * interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            yield _event(model, {}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--ttft", type=float, default=0.2, help="Seconds before the first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(args.ttft, args.tokens_per_second, args.output_tokens),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
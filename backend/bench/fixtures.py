@@ -0,0 +1,136 @@
+"""
+Offline transcript and metadata provider for benchmarks.
+
+Replaces the YouTube transcript and yt-dlp fetches in transcript_extractor with
+synthetic fixture transcripts of fixed lengths, so the rest of the extraction
+path (caching, thread pool, deadlines) is still exercised. The tokenizer can be
+replaced too, since tiktoken downloads its encodings on first use.
+"""
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List
+
+import transcript_extractor
+
+# Transcript length in words; "long" is past LONG_VIDEO_THRESHOLD_TOKENS, so it goes through map-reduce
+FIXTURE_WORDS = {
+    "short": 1500,
+    "medium": 8000,
+    "long": 40000,
+}
+
+_VOCABULARY = (
+    "so today we are going to look at how the new model handles long context "
+    "and what that means for people building real products with it because "
+    "the results were honestly surprising once we ran the full benchmark again"
+).split()
+
+# Words per caption cue, roughly what YouTube's auto-generated captions use
+_CUE_WORDS = 8
+
+# One offline token: a word with the whitespace before it, or trailing whitespace
+_TOKEN_PIECE = re.compile(r"\s*\S+|\s+")
+
+
+class OfflineEncoding:
+    """
+    Deterministic stand-in for a tiktoken encoding that needs no download.
+
+    Every word is one token, close to cl100k_base for plain English, and
+    decode(encode(text)) returns the text unchanged.
+    """
+
+    name = "bench-offline"
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._pieces: List[str] = []
+        self._lock = threading.Lock()
+
+    def encode(self, text: str, **kwargs: Any) -> List[int]:
+        tokens = []
+
+        with self._lock:
+            for piece in _TOKEN_PIECE.findall(text):
+                token = self._ids.get(piece)
+                if token is None:
+                    token = self._ids[piece] = len(self._pieces)
+                    self._pieces.append(piece)
+                tokens.append(token)
+
+        return tokens
+
+    def decode(self, tokens: List[int]) -> str:
+        return "".join(self._pieces[token] for token in tokens)
+
+
+@lru_cache(maxsize=None)
+def fixture_transcript(name: str) -> str:
+    """
+    Return the deterministic transcript for a fixture name.
+    """
+    if name not in FIXTURE_WORDS:
+        raise ValueError(f"Unknown fixture: {name}")
+
+    rng = random.Random(name)
+    return " ".join(rng.choice(_VOCABULARY) for _ in range(FIXTURE_WORDS[name]))
+
+
+def fixture_cues(name: str) -> List[str]:
+    """
+    Return a fixture transcript split into caption cues.
+    """
+    words = fixture_transcript(name).split()
+    return [" ".join(words[i : i + _CUE_WORDS]) for i in range(0, len(words), _CUE_WORDS)]
+
+
+def fixture_video_url(name: str, index: int) -> str:
+    return f"https://www.youtube.com/watch?v=bench-{name}-{index}"
+
+
+def _fixture_name(video_id: str) -> str:
+    # Video IDs look like "bench-<fixture>-<index>"
+    parts = video_id.split("-")
+    if len(parts) != 3 or parts[0] != "bench":
+        raise ValueError(f"Not a benchmark video ID: {video_id}")
+    return parts[1]
+
+
+def install_offline_tokenizer() -> None:
+    """
+    Serve every tiktoken encoding from one OfflineEncoding.
+
+    Must run before the backend first loads its encoder.
+    """
+    import tiktoken
+
+    encoding = OfflineEncoding()
+    tiktoken.get_encoding = lambda name: encoding
+
+
+def install_stub_provider(
+    transcript_latency_seconds: float = 0.0, metadata_latency_seconds: float = 0.0
+) -> None:
+    """
+    Route transcript and metadata fetches to the fixtures, with simulated network latency.
+    """
+
+    def fetch_transcript(video_id: str) -> List[str]:
+        time.sleep(transcript_latency_seconds)
+        return fixture_cues(_fixture_name(video_id))
+
+    def fetch_video_metadata(video_url: str) -> Dict[str, Any]:
+        time.sleep(metadata_latency_seconds)
+        video_id = transcript_extractor.extract_video_id(video_url)
+        name = _fixture_name(video_id)
+        return {
+            "title": f"Benchmark video ({name})",
+            "channel": "Benchmark Channel",
+            "duration_seconds": FIXTURE_WORDS[name] // 3,
+        }
+
+    transcript_extractor._fetch_transcript = fetch_transcript
+    transcript_extractor._fetch_video_metadata = fetch_video_metadata
@@ -0,0 +1,274 @@
+"""
+Offline end-to-end benchmark for the summarization backend.
+
+Starts fake llama-server instances and the FastAPI app on local ports, replaces
+the YouTube fetches with fixture transcripts, then drives /summarize at a fixed
+concurrency and reports latency, time-to-first-token and throughput.
+
+Run from the backend directory:
+
+    python bench/run_bench.py --requests 200 --concurrency 16 --fixtures short,medium
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+import httpx
+import uvicorn
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from fake_llama import create_app  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def _configure_environment(args, llama_urls: List[str], state_dir: str) -> None:
+    # config.py reads the environment at import, so this must run before importing the app
+    os.environ["LLAMA_SERVER_URLS"] = ",".join(llama_urls)
+    os.environ["LLAMA_SERVER_URL"] = llama_urls[0]
+    os.environ.setdefault("LLAMA_SERVER_MODEL", "bench")
+    # The Groq client appends /openai/v1/chat/completions, which the fake server also serves
+    os.environ["GROQ_BASE_URL"] = llama_urls[0]
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    os.environ.setdefault("GROQ_MODEL", "bench")
+    os.environ["SUMMARY_CACHE_ENABLED"] = "true" if args.summary_cache else "false"
+    os.environ["SUMMARY_CACHE_PATH"] = os.path.join(state_dir, "summaries.sqlite3")
+    os.environ["JOBS_ENABLED"] = "false"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile; 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+async def _summarize_once(client: httpx.AsyncClient, video_url: str, use_local: bool) -> Dict:
+    started = time.perf_counter()
+    first_chunk = None
+    body = []
+
+    try:
+        async with client.stream(
+            "POST", "/summarize", json={"video_url": video_url, "use_local": use_local}
+        ) as response:
+            async for text in response.aiter_text():
+                if text and first_chunk is None:
+                    first_chunk = time.perf_counter() - started
+                body.append(text)
+            status = response.status_code
+    except httpx.HTTPError as e:
+        return {"status": type(e).__name__, "latency": time.perf_counter() - started}
+
+    return {
+        "status": status,
+        "latency": time.perf_counter() - started,
+        "ttft": first_chunk,
+        "tokens": len("".join(body).split()) if status == 200 else 0,
+    }
+
+
+async def drive(base_url: str, video_urls: List[str], concurrency: int, use_local: bool) -> Dict:
+    """
+    Send one /summarize request per URL with at most `concurrency` in flight.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for video_url in video_urls:
+        queue.put_nowait(video_url)
+
+    results = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+
+        async def worker():
+            while not queue.empty():
+                results.append(await _summarize_once(client, queue.get_nowait(), use_local))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    ok = [result for result in results if result["status"] == 200]
+    latencies = [result["latency"] for result in ok]
+    ttfts = [result["ttft"] for result in ok if result["ttft"] is not None]
+
+    return {
+        "requests": len(results),
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "statuses": dict(Counter(str(result["status"]) for result in results)),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0.0,
+        "output_tokens_per_second": (
+            round(sum(result["tokens"] for result in ok) / elapsed, 1) if elapsed else 0.0
+        ),
+        "latency_seconds": {
+            f"p{pct}": round(percentile(latencies, pct), 4) for pct in (50, 95, 99)
+        },
+        "ttft_seconds": {f"p{pct}": round(percentile(ttfts, pct), 4) for pct in (50, 95, 99)},
+    }
+
+
+def _print_report(report: Dict) -> None:
+    print(f"requests      {report['requests']} at concurrency {report['concurrency']}")
+    print(f"statuses      {report['statuses']}")
+    print(f"elapsed       {report['elapsed_seconds']}s")
+    print(
+        f"throughput    {report['throughput_rps']} req/s, "
+        f"{report['output_tokens_per_second']} tokens/s"
+    )
+
+    for name in ("latency_seconds", "ttft_seconds"):
+        values = report[name]
+        print(f"{name:<13} p50={values['p50']}  p95={values['p95']}  p99={values['p99']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline /summarize benchmark.")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--fixtures", default="short,medium", help="Comma-separated mix of short, medium, long."
+    )
+    parser.add_argument(
+        "--distinct-videos",
+        type=int,
+        default=0,
+        help="Reuse this many video IDs per fixture (0 makes every request a new video).",
+    )
+    parser.add_argument("--provider", choices=["local", "groq"], default="local")
+    parser.add_argument("--llama-instances", type=int, default=1)
+    parser.add_argument("--ttft", type=float, default=0.2, help="Fake server time-to-first-token.")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--transcript-latency", type=float, default=0.05)
+    parser.add_argument("--metadata-latency", type=float, default=0.1)
+    parser.add_argument("--summary-cache", action="store_true", help="Leave the summary cache on.")
+    parser.add_argument(
+        "--tiktoken",
+        action="store_true",
+        help="Count tokens with the real TOKENIZER_ENCODING (must be cached or downloadable) "
+        "instead of the offline word tokenizer.",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    parser.add_argument(
+        "--max-p95-seconds",
+        type=float,
+        default=0.0,
+        help="Exit non-zero if p95 latency exceeds this (0 disables the check).",
+    )
+    parser.add_argument("--verbose", action="store_true", help="Keep the backend's INFO logs.")
+    args = parser.parse_args()
+
+    fixture_names = [name.strip() for name in args.fixtures.split(",") if name.strip()]
+    state_dir = tempfile.mkdtemp(prefix="summarizer-bench-")
+
+    llama_urls = []
+    for _ in range(max(1, args.llama_instances)):
+        port = _free_port()
+        _serve(create_app(args.ttft, args.tokens_per_second, args.output_tokens), port)
+        llama_urls.append(f"http://127.0.0.1:{port}")
+
+    _configure_environment(args, llama_urls, state_dir)
+
+    from fixtures import (  # noqa: E402
+        fixture_video_url,
+        install_offline_tokenizer,
+        install_stub_provider,
+    )
+
+    if args.tiktoken:
+        from tokens import get_encoding  # noqa: E402
+
+        # Fail now rather than on every request when the encoding cannot be fetched
+        try:
+            get_encoding()
+        except Exception as e:
+            print(
+                f"Could not load the tiktoken encoding: {e}. Point TIKTOKEN_CACHE_DIR at a "
+                "directory that holds it, or drop --tiktoken.",
+                file=sys.stderr,
+            )
+            return 1
+    else:
+        install_offline_tokenizer()
+
+    import main as backend  # noqa: E402
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        for name in logging.root.manager.loggerDict:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+    install_stub_provider(args.transcript_latency, args.metadata_latency)
+
+    app_port = _free_port()
+    server = _serve(backend.app, app_port)
+
+    video_urls = []
+    for index in range(args.requests):
+        name = fixture_names[index % len(fixture_names)]
+        video_index = index % args.distinct_videos if args.distinct_videos else index
+        video_urls.append(fixture_video_url(name, video_index))
+
+    try:
+        report = asyncio.run(
+            drive(
+                f"http://127.0.0.1:{app_port}",
+                video_urls,
+                max(1, args.concurrency),
+                args.provider == "local",
+            )
+        )
+    finally:
+        server.should_exit = True
+
+    report["fixtures"] = fixture_names
+    report["provider"] = args.provider
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+    if report["statuses"].get("200", 0) != report["requests"]:
+        print("Some requests failed.", file=sys.stderr)
+        return 1
+    if args.max_p95_seconds and report["latency_seconds"]["p95"] > args.max_p95_seconds:
+        print(f"p95 latency is above {args.max_p95_seconds}s.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
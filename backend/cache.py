@@ -0,0 +1,228 @@
+import hashlib
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import config
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Roughly estimate the memory held by a cached value, in bytes.
+    """
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(k) + estimate_size(v) for k, v in value.items()) + 64
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value) + 56
+    return sys.getsizeof(value)
+
+
+class MemoryCache:
+    """
+    Thread-safe in-memory LRU cache with time-based expiry and an optional memory budget.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_bytes: int = 0):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        if self.max_entries == 0:
+            return
+
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else None
+        size = estimate_size(value) if self.max_bytes else 0
+
+        # A single value larger than the whole budget is never worth keeping
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes and self._bytes > self.max_bytes
+            ):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SummaryCache:
+    """
+    Two-tier summary cache: an in-memory LRU in front of a SQLite store.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_entries: int,
+        disk_max_entries: int,
+        ttl_seconds: float,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.disk_max_entries = disk_max_entries
+        self.memory = MemoryCache(max_entries, ttl_seconds)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS summaries_accessed_at ON summaries (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        summary = self.memory.get(key)
+        if summary is not None:
+            return summary
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, created_at FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            summary, created_at = row
+            if self.ttl_seconds and created_at + self.ttl_seconds <= now:
+                self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute(
+                "UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+
+        self.memory.set(key, summary)
+        return summary
+
+    def set(self, key: str, summary: str) -> None:
+        if not summary:
+            return
+
+        self.memory.set(key, summary)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, summary, now, now),
+            )
+            self._prune(now)
+            self._conn.commit()
+
+    def _prune(self, now: float) -> None:
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE created_at <= ?", (now - self.ttl_seconds,)
+            )
+
+        if self.disk_max_entries > 0:
+            self._conn.execute(
+                "DELETE FROM summaries WHERE key NOT IN "
+                "(SELECT key FROM summaries ORDER BY accessed_at DESC LIMIT ?)",
+                (self.disk_max_entries,),
+            )
+
+
+def summary_cache_key(video_id: str, provider: str, prompt_template: str) -> str:
+    """
+    Build the cache key for a summary from the video, provider/model and prompt version.
+    """
+    prompt_hash = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()[:16]
+    return f"{video_id}:{provider}:{prompt_hash}"
+
+
+_summary_cache: Optional[SummaryCache] = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> Optional[SummaryCache]:
+    """
+    Return the process-wide summary cache, or None when caching is disabled.
+    """
+    global _summary_cache
+
+    if not config.SUMMARY_CACHE_ENABLED:
+        return None
+
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = SummaryCache(
+                db_path=config.SUMMARY_CACHE_PATH,
+                max_entries=config.SUMMARY_CACHE_MAX_ENTRIES,
+                disk_max_entries=config.SUMMARY_CACHE_DISK_MAX_ENTRIES,
+                ttl_seconds=config.SUMMARY_CACHE_TTL_SECONDS,
+            )
+            logger.info(f"Summary cache opened at {config.SUMMARY_CACHE_PATH}.")
+
+    return _summary_cache
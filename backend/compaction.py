@@ -0,0 +1,222 @@
+import logging
+import math
+import re
+from collections import Counter as TermCounter
+from typing import Dict, Iterable, List, Tuple
+
+import config
+from metrics import Counter, register
+from tokens import estimate_tokens, get_encoding
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_TOKENS = register(
+    Counter(
+        "summarizer_transcript_tokens_total",
+        "Estimated transcript tokens before and after compaction.",
+        ["stage"],
+    )
+)
+
+# Caption markers such as [Music], (Applause) or ♪, which carry no speech. Only known
+# markers match, so indices, citations and speaker labels in brackets are kept
+_NON_SPEECH_MARKERS = (
+    r"(?:music(?: playing)?|applause|laughter|laughs|laughing|cheering|cheers|inaudible"
+    r"|silence|crosstalk|(?:background )?noise|foreign|no audio|blank_audio|♪+)"
+)
+_NON_SPEECH = re.compile(
+    rf"\[\s*{_NON_SPEECH_MARKERS}\s*\]|\(\s*{_NON_SPEECH_MARKERS}\s*\)|♪+", re.I
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Longest cue prefix checked against the text before it, in words
+_MAX_CUE_OVERLAP_WORDS = 32
+# Auto-generated captions rarely have punctuation, so long runs are cut into passages
+_MAX_PASSAGE_WORDS = 60
+_PASSAGE_WORDS = 40
+
+_STOP_WORDS = frozenset(
+    """
+    a about above after again against all am an and any are as at be because been before
+    being below between both but by can could did do does doing down during each few for
+    from further had has have having he her here hers herself him himself his how i if in
+    into is it its itself just let me more most my myself no nor not now of off on once only
+    or other our ours ourselves out over own really right same she should so some such than
+    that the their theirs them themselves then there these they this those through to too
+    under until up very was we were what when where which while who whom why will with would
+    yeah you your yours yourself yourselves going gonna get got know like okay actually
+    """.split()
+)
+
+
+def _filler_pattern() -> "re.Pattern":
+    words = [word.strip() for word in config.TRANSCRIPT_FILLER_WORDS.split(",") if word.strip()]
+    if not words:
+        return re.compile(r"(?!)")
+    alternatives = "|".join(re.escape(word) for word in words)
+    return re.compile(rf"\b(?:{alternatives})\b[,.]?", re.I)
+
+
+_FILLER = _filler_pattern()
+
+
+def _normalize(word: str) -> str:
+    return "".join(_WORD.findall(word.lower()))
+
+
+def clean_cue(text: str) -> str:
+    """
+    Remove non-speech markers and filler words from one caption cue.
+    """
+    text = _NON_SPEECH.sub(" ", text)
+    text = _FILLER.sub(" ", text)
+    return " ".join(text.split())
+
+
+def merge_cues(cues: Iterable[str]) -> str:
+    """
+    Join caption cues, dropping words a cue repeats from the end of the text before it.
+
+    Rolling auto-generated captions often start each cue with the last words of
+    the previous one. Overlaps must be at least two words, or the whole cue, so a
+    single shared word like "the" is not mistaken for a repeat.
+    """
+    words: List[str] = []
+    normalized: List[str] = []
+
+    for cue in cues:
+        cue_words = cue.split()
+        if not cue_words:
+            continue
+
+        cue_normalized = [_normalize(word) for word in cue_words]
+        overlap = 0
+
+        for size in range(min(len(cue_words), len(words), _MAX_CUE_OVERLAP_WORDS), 0, -1):
+            if size < 2 and size < len(cue_words):
+                break
+            if normalized[-size:] == cue_normalized[:size]:
+                overlap = size
+                break
+
+        words.extend(cue_words[overlap:])
+        normalized.extend(cue_normalized[overlap:])
+
+    return " ".join(words)
+
+
+def _split_passages(text: str) -> List[str]:
+    passages = []
+
+    for sentence in _SENTENCE_END.split(text):
+        words = sentence.split()
+        if len(words) <= _MAX_PASSAGE_WORDS:
+            if words:
+                passages.append(" ".join(words))
+            continue
+
+        for start in range(0, len(words), _PASSAGE_WORDS):
+            passages.append(" ".join(words[start : start + _PASSAGE_WORDS]))
+
+    return passages
+
+
+def _passage_terms(passage: str) -> List[str]:
+    return [
+        term for term in _WORD.findall(passage.lower()) if len(term) > 2 and term not in _STOP_WORDS
+    ]
+
+
+def select_passages(text: str, target_tokens: int) -> str:
+    """
+    Keep the most informative passages, in their original order, within `target_tokens`.
+
+    Passages are scored by the TF-IDF weight of the terms they contain, with the
+    passages treated as documents, and normalised for length. The first and
+    last passages are always kept for the video's framing.
+    """
+    passages = _split_passages(text)
+    if len(passages) <= 2:
+        return text
+
+    encoding = get_encoding()
+    sizes = [
+        int(math.ceil(len(encoding.encode(passage)) * config.TOKEN_COUNT_SCALE))
+        for passage in passages
+    ]
+    if sum(sizes) <= target_tokens:
+        return text
+
+    terms = [_passage_terms(passage) for passage in passages]
+    term_counts = TermCounter(term for passage_terms in terms for term in passage_terms)
+    document_counts = TermCounter(term for passage_terms in terms for term in set(passage_terms))
+    weights = {
+        term: count * (math.log((1 + len(passages)) / (1 + document_counts[term])) + 1)
+        for term, count in term_counts.items()
+    }
+
+    scores = [
+        sum(weights[term] for term in set(passage_terms)) / math.sqrt(max(1, len(passage_terms)))
+        for passage_terms in terms
+    ]
+
+    last = len(passages) - 1
+    selected = {0, last}
+    used = sizes[0] + sizes[last]
+
+    for index in sorted(range(1, last), key=lambda i: scores[i], reverse=True):
+        if used + sizes[index] > target_tokens:
+            continue
+        selected.add(index)
+        used += sizes[index]
+
+    return " ".join(passages[index] for index in sorted(selected))
+
+
+def compact_transcript(cues: Iterable[str], video_id: str = "") -> Tuple[str, Dict[str, int]]:
+    """
+    Turn caption cues into prompt-ready transcript text.
+
+    With TRANSCRIPT_COMPACTION_ENABLED, non-speech markers and filler words are
+    removed and overlapping cue text is merged; with
+    TRANSCRIPT_COMPACT_TARGET_TOKENS set, the result is then cut down to that
+    many tokens by extractive passage selection. Returns the text and its
+    estimated token counts before and after, or no counts when compaction is off.
+
+    Both token-counting steps are best-effort: if the tokenizer fails, passage
+    selection is skipped and no counts are returned, so a transcript is never
+    lost to compaction.
+    """
+    cues = list(cues)
+    raw_text = " ".join(cue.strip() for cue in cues if cue.strip())
+
+    if not config.TRANSCRIPT_COMPACTION_ENABLED:
+        return raw_text, {}
+
+    label = f" for {video_id}" if video_id else ""
+    text = merge_cues(clean_cue(cue) for cue in cues)
+    if config.TRANSCRIPT_COMPACT_TARGET_TOKENS > 0:
+        try:
+            text = select_passages(text, config.TRANSCRIPT_COMPACT_TARGET_TOKENS)
+        except Exception as e:
+            logger.warning(f"Passage selection skipped{label}: {e}")
+
+    try:
+        stats = {"tokens_before": estimate_tokens(raw_text), "tokens_after": estimate_tokens(text)}
+    except Exception as e:
+        logger.warning(f"Could not count compacted transcript tokens{label}: {e}")
+        return text, {}
+
+    TRANSCRIPT_TOKENS.inc(stats["tokens_before"], stage="raw")
+    TRANSCRIPT_TOKENS.inc(stats["tokens_after"], stage="compacted")
+
+    saved = stats["tokens_before"] - stats["tokens_after"]
+    logger.info(
+        f"Transcript compacted{label}: "
+        f"{stats['tokens_before']} -> {stats['tokens_after']} tokens "
+        f"({saved / max(1, stats['tokens_before']):.0%} saved)."
+    )
+    return text, stats
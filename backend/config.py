@@ -3,11 +3,153 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return float(value)
+
+
 # Llama server configuration
 LLAMA_SERVER_URL = os.getenv("LLAMA_SERVER_URL")
+# Comma-separated pool of "url|weight" entries; overrides LLAMA_SERVER_URL when set
+LLAMA_SERVER_URLS = os.getenv("LLAMA_SERVER_URLS")
 LLAMA_SERVER_MODEL = os.getenv("LLAMA_SERVER_MODEL")
 LLAMA_API_KEY = os.getenv("LLAMA_API_KEY")
+LLAMA_POOL_MAX_CONNECTIONS = _env_int("LLAMA_POOL_MAX_CONNECTIONS", 64)
+LLAMA_POOL_MAX_KEEPALIVE = _env_int("LLAMA_POOL_MAX_KEEPALIVE", 16)
+LLAMA_POOL_KEEPALIVE_EXPIRY_SECONDS = _env_float("LLAMA_POOL_KEEPALIVE_EXPIRY_SECONDS", 30.0)
+LLAMA_CONNECT_TIMEOUT_SECONDS = _env_float("LLAMA_CONNECT_TIMEOUT_SECONDS", 10.0)
+LLAMA_READ_TIMEOUT_SECONDS = _env_float("LLAMA_READ_TIMEOUT_SECONDS", 60.0)
+LLAMA_CONTEXT_TOKENS = _env_int("LLAMA_CONTEXT_TOKENS", 32768)
+LLAMA_MAX_OUTPUT_TOKENS = _env_int("LLAMA_MAX_OUTPUT_TOKENS", 4096)
+LLAMA_HEALTH_CHECK_INTERVAL_SECONDS = _env_float("LLAMA_HEALTH_CHECK_INTERVAL_SECONDS", 10.0)
+LLAMA_HEALTH_CHECK_TIMEOUT_SECONDS = _env_float("LLAMA_HEALTH_CHECK_TIMEOUT_SECONDS", 2.0)
+LLAMA_CIRCUIT_FAILURE_THRESHOLD = _env_int("LLAMA_CIRCUIT_FAILURE_THRESHOLD", 3)
+LLAMA_CIRCUIT_COOLDOWN_SECONDS = _env_float("LLAMA_CIRCUIT_COOLDOWN_SECONDS", 30.0)
+LLAMA_FAILOVER_TO_GROQ = _env_bool("LLAMA_FAILOVER_TO_GROQ", False)
+
+# llama-server prompt (KV) cache reuse; LLAMA_SLOTS_PER_SERVER must match llama-server --parallel
+LLAMA_CACHE_PROMPT = _env_bool("LLAMA_CACHE_PROMPT", True)
+LLAMA_SLOTS_PER_SERVER = _env_int("LLAMA_SLOTS_PER_SERVER", 0)
+LLAMA_AFFINITY_MAX_EXTRA_OUTSTANDING = _env_int("LLAMA_AFFINITY_MAX_EXTRA_OUTSTANDING", 2)
 
 # Groq configuration
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL")
+GROQ_CONTEXT_TOKENS = _env_int("GROQ_CONTEXT_TOKENS", 131072)
+GROQ_MAX_COMPLETION_TOKENS = _env_int("GROQ_MAX_COMPLETION_TOKENS", 8192)
+
+# Summary cache configuration
+SUMMARY_CACHE_ENABLED = _env_bool("SUMMARY_CACHE_ENABLED", True)
+SUMMARY_CACHE_MAX_ENTRIES = _env_int("SUMMARY_CACHE_MAX_ENTRIES", 256)
+SUMMARY_CACHE_DISK_MAX_ENTRIES = _env_int("SUMMARY_CACHE_DISK_MAX_ENTRIES", 10000)
+SUMMARY_CACHE_TTL_SECONDS = _env_int("SUMMARY_CACHE_TTL_SECONDS", 7 * 24 * 3600)
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "summary_cache.sqlite3")
+
+# Transcript and metadata cache configuration
+CONTEXT_CACHE_MAX_ENTRIES = _env_int("CONTEXT_CACHE_MAX_ENTRIES", 2048)
+CONTEXT_CACHE_MAX_BYTES = _env_int("CONTEXT_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+TRANSCRIPT_CACHE_TTL_SECONDS = _env_int("TRANSCRIPT_CACHE_TTL_SECONDS", 6 * 3600)
+METADATA_CACHE_TTL_SECONDS = _env_int("METADATA_CACHE_TTL_SECONDS", 24 * 3600)
+NEGATIVE_CACHE_TTL_SECONDS = _env_int("NEGATIVE_CACHE_TTL_SECONDS", 600)
+TRANSIENT_ERROR_CACHE_TTL_SECONDS = _env_int("TRANSIENT_ERROR_CACHE_TTL_SECONDS", 30)
+
+# Video context extraction configuration
+EXTRACT_MAX_WORKERS = _env_int("EXTRACT_MAX_WORKERS", 16)
+METADATA_TIMEOUT_SECONDS = _env_float("METADATA_TIMEOUT_SECONDS", 10.0)
+TRANSCRIPT_TIMEOUT_SECONDS = _env_float("TRANSCRIPT_TIMEOUT_SECONDS", 30.0)
+METADATA_FAST_MODE = _env_bool("METADATA_FAST_MODE", True)
+TRANSCRIPT_HTTP_POOL_SIZE = _env_int("TRANSCRIPT_HTTP_POOL_SIZE", 16)
+TRANSCRIPT_HTTP_CONNECT_TIMEOUT_SECONDS = _env_float("TRANSCRIPT_HTTP_CONNECT_TIMEOUT_SECONDS", 5.0)
+TRANSCRIPT_HTTP_READ_TIMEOUT_SECONDS = _env_float("TRANSCRIPT_HTTP_READ_TIMEOUT_SECONDS", 15.0)
+
+# Transcript compaction configuration (a target of 0 disables extractive selection)
+TRANSCRIPT_COMPACTION_ENABLED = _env_bool("TRANSCRIPT_COMPACTION_ENABLED", True)
+TRANSCRIPT_FILLER_WORDS = os.getenv("TRANSCRIPT_FILLER_WORDS", "um,umm,uh,uhh,uhm,erm,hmm,mhm")
+TRANSCRIPT_COMPACT_TARGET_TOKENS = _env_int("TRANSCRIPT_COMPACT_TARGET_TOKENS", 0)
+
+# Long-video (map-reduce) summarization configuration
+LONG_VIDEO_MODE_ENABLED = _env_bool("LONG_VIDEO_MODE_ENABLED", True)
+LONG_VIDEO_THRESHOLD_TOKENS = _env_int("LONG_VIDEO_THRESHOLD_TOKENS", 24000)
+MAP_CHUNK_TOKENS = _env_int("MAP_CHUNK_TOKENS", 6000)
+MAP_CHUNK_OVERLAP_TOKENS = _env_int("MAP_CHUNK_OVERLAP_TOKENS", 100)
+MAP_PARALLELISM = _env_int("MAP_PARALLELISM", 4)
+
+# Token budget configuration
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+TOKEN_COUNT_SCALE = _env_float("TOKEN_COUNT_SCALE", 1.15)
+TOKEN_COUNT_CACHE_ENTRIES = _env_int("TOKEN_COUNT_CACHE_ENTRIES", 4096)
+
+# Batch summarization configuration
+BATCH_MAX_VIDEOS = _env_int("BATCH_MAX_VIDEOS", 200)
+BATCH_DEFAULT_CONCURRENCY = _env_int("BATCH_DEFAULT_CONCURRENCY", 4)
+BATCH_DEFAULT_EXTRACT_CONCURRENCY = _env_int("BATCH_DEFAULT_EXTRACT_CONCURRENCY", 8)
+BATCH_MAX_CONCURRENCY = _env_int("BATCH_MAX_CONCURRENCY", 16)
+
+# Background job queue configuration
+JOBS_ENABLED = _env_bool("JOBS_ENABLED", True)
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs.sqlite3")
+JOB_WORKERS = _env_int("JOB_WORKERS", 2)
+JOB_MAX_ATTEMPTS = _env_int("JOB_MAX_ATTEMPTS", 3)
+JOB_RETRY_BASE_SECONDS = _env_float("JOB_RETRY_BASE_SECONDS", 5.0)
+JOB_RETRY_MAX_SECONDS = _env_float("JOB_RETRY_MAX_SECONDS", 300.0)
+JOB_POLL_INTERVAL_SECONDS = _env_float("JOB_POLL_INTERVAL_SECONDS", 1.0)
+
+# Admission control configuration (per inference provider)
+LLAMA_MAX_CONCURRENCY = _env_int("LLAMA_MAX_CONCURRENCY", 4)
+LLAMA_MAX_QUEUE = _env_int("LLAMA_MAX_QUEUE", 16)
+GROQ_MAX_CONCURRENCY = _env_int("GROQ_MAX_CONCURRENCY", 16)
+GROQ_MAX_QUEUE = _env_int("GROQ_MAX_QUEUE", 64)
+ADMISSION_QUEUE_TIMEOUT_SECONDS = _env_float("ADMISSION_QUEUE_TIMEOUT_SECONDS", 30.0)
+ADMISSION_RETRY_AFTER_SECONDS = _env_float("ADMISSION_RETRY_AFTER_SECONDS", 5.0)
+
+# Automatic provider selection (use_local="auto"); the speeds are priors until real samples arrive
+AUTO_EXPECTED_OUTPUT_TOKENS = _env_int("AUTO_EXPECTED_OUTPUT_TOKENS", 600)
+AUTO_LOCAL_PREFERENCE_SECONDS = _env_float("AUTO_LOCAL_PREFERENCE_SECONDS", 2.0)
+AUTO_EWMA_ALPHA = _env_float("AUTO_EWMA_ALPHA", 0.2)
+AUTO_LLAMA_PREFILL_TOKENS_PER_SECOND = _env_float("AUTO_LLAMA_PREFILL_TOKENS_PER_SECOND", 1000.0)
+AUTO_LLAMA_DECODE_TOKENS_PER_SECOND = _env_float("AUTO_LLAMA_DECODE_TOKENS_PER_SECOND", 30.0)
+AUTO_GROQ_PREFILL_TOKENS_PER_SECOND = _env_float("AUTO_GROQ_PREFILL_TOKENS_PER_SECOND", 20000.0)
+AUTO_GROQ_DECODE_TOKENS_PER_SECOND = _env_float("AUTO_GROQ_DECODE_TOKENS_PER_SECOND", 300.0)
+
+# Hedged requests (interactive /summarize only); the hedge needs a free slot on the other provider
+HEDGE_ENABLED = _env_bool("HEDGE_ENABLED", False)
+HEDGE_DELAY_SECONDS = _env_float("HEDGE_DELAY_SECONDS", 3.0)
+
+# Response streaming configuration (set both to 0 to write every token delta)
+STREAM_FLUSH_MAX_CHARS = _env_int("STREAM_FLUSH_MAX_CHARS", 256)
+STREAM_FLUSH_INTERVAL_SECONDS = _env_float("STREAM_FLUSH_INTERVAL_SECONDS", 0.05)
+# How often a client is checked for disconnects while its stream is waiting on the model
+STREAM_DISCONNECT_POLL_SECONDS = _env_float("STREAM_DISCONNECT_POLL_SECONDS", 1.0)
+
+# Resumable stream configuration
+STREAM_DETACH_GRACE_SECONDS = _env_float("STREAM_DETACH_GRACE_SECONDS", 15.0)
+STREAM_RETENTION_SECONDS = _env_float("STREAM_RETENTION_SECONDS", 600.0)
+STREAM_RETENTION_MAX_ENTRIES = _env_int("STREAM_RETENTION_MAX_ENTRIES", 256)
+STREAM_RETENTION_MAX_BYTES = _env_int("STREAM_RETENTION_MAX_BYTES", 16 * 1024 * 1024)
+
+# Startup warm-up configuration
+WARMUP_ENABLED = _env_bool("WARMUP_ENABLED", True)
+WARMUP_INFERENCE_ENABLED = _env_bool("WARMUP_INFERENCE_ENABLED", True)
+WARMUP_TIMEOUT_SECONDS = _env_float("WARMUP_TIMEOUT_SECONDS", 60.0)
+
+# Server configuration (reload is for development only)
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = _env_int("SERVER_PORT", 8000)
+SERVER_RELOAD = _env_bool("SERVER_RELOAD", False)
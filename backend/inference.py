@@ -1,82 +1,438 @@
+import asyncio
 import json
+import logging
 import os
-import requests
+from typing import AsyncIterator, Dict, Optional
+import httpx
 import config
-from groq import Groq
+from groq import AsyncGroq
+from admission import get_limiter
+from metrics import HEDGED_GENERATIONS
+from routing import LlamaEndpoint, get_llama_pool, slot_for_key
+from tokens import plan_prompt_budget
 
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-def call_llama_server_inference(prompt: list) -> str:
+# One keep-alive connection pool per llama-server base URL
+_llama_clients: Dict[str, httpx.AsyncClient] = {}
+_groq_client: Optional[AsyncGroq] = None
+
+
+def _get_llama_client(llama_url: str) -> httpx.AsyncClient:
     """
-    Call the local inference service (llama-server) to get a summary.
+    Return the shared keep-alive connection pool for a llama-server URL.
     """
-    llama_url = os.environ.get("LLAMA_SERVER_URL", config.LLAMA_SERVER_URL)
-    llama_model = os.environ.get("LLAMA_SERVER_MODEL", config.LLAMA_SERVER_MODEL)
+    base_url = llama_url.rstrip("/")
+    client = _llama_clients.get(base_url)
+
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(
+                max_connections=config.LLAMA_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=config.LLAMA_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=config.LLAMA_POOL_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(
+                config.LLAMA_READ_TIMEOUT_SECONDS,
+                connect=config.LLAMA_CONNECT_TIMEOUT_SECONDS,
+            ),
+        )
+        _llama_clients[base_url] = client
+
+    return client
+
+
+async def close_inference_clients() -> None:
+    """
+    Close every pooled llama-server connection and the shared Groq client.
+    """
+    global _groq_client
+
+    clients = list(_llama_clients.values())
+    _llama_clients.clear()
+
+    for client in clients:
+        await client.aclose()
+
+    if _groq_client is not None:
+        await _groq_client.close()
+        _groq_client = None
+
+
+async def _stream_llama_endpoint(
+    endpoint: LlamaEndpoint, headers: dict, payload: dict
+) -> AsyncIterator[str]:
+    client = _get_llama_client(endpoint.url)
+
+    async with client.stream(
+        "POST", "/v1/chat/completions", headers=headers, json=payload
+    ) as response:
+        response.raise_for_status()
+
+        async for line in response.aiter_lines():
+            if not line or line.startswith(":"):
+                continue
+            if line.startswith("data:"):
+                line = line[len("data:") :].strip()
+            if line == "[DONE]":
+                break
+
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            choice = data.get("choices", [{}])[0]
+            delta = choice.get("delta") or choice.get("message") or {}
+            content = delta.get("content")
+            
+            if content:
+                yield content
+
+
+def _llama_headers() -> dict:
     llama_api_key = os.environ.get("LLAMA_API_KEY", config.LLAMA_API_KEY)
+    headers = {"Content-Type": "application/json"}
+
+    if llama_api_key:
+        headers["Authorization"] = f"Bearer {llama_api_key}"
+
+    return headers
+
+
+def _is_endpoint_failure(error: httpx.HTTPError) -> bool:
+    # Client errors (bad request, context overflow) are not the instance's fault
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return True
+
+
+async def call_llama_server_inference(
+    prompt: list, affinity_key: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Call the local inference service (llama-server) and stream the summary.
+
+    Requests go to the least-loaded healthy endpoint in the pool. If an endpoint
+    fails before producing output, the next one is tried. Requests with an
+    affinity key (the video ID) stick to one endpoint and, when
+    LLAMA_SLOTS_PER_SERVER is set, one slot, so repeat prompts reuse its KV cache.
+    """
+    llama_model = os.environ.get("LLAMA_SERVER_MODEL", config.LLAMA_SERVER_MODEL)
+    pool = get_llama_pool()
 
     try:
-        if not llama_url:
+        if not pool.endpoints:
             raise ValueError("LLAMA_SERVER_URL is not configured.")
         
         if not llama_model:
             raise ValueError("LLAMA_SERVER_MODEL is not configured.")
 
-        endpoint = f"{llama_url.rstrip('/')}/v1/chat/completions"
-        headers = {"Content-Type": "application/json"}
-        
-        if llama_api_key:
-            headers["Authorization"] = f"Bearer {llama_api_key}"
+        headers = _llama_headers()
+        payload = {
+            "model": llama_model,
+            "messages": prompt,
+            "stream": True,
+            "max_tokens": config.LLAMA_MAX_OUTPUT_TOKENS,
+            "cache_prompt": config.LLAMA_CACHE_PROMPT,
+        }
+        if affinity_key and config.LLAMA_SLOTS_PER_SERVER > 0:
+            payload["id_slot"] = slot_for_key(affinity_key, config.LLAMA_SLOTS_PER_SERVER)
 
-        payload = {"model": llama_model, "messages": prompt, "stream": True}
+        tried = []
 
-        with requests.post(
-            endpoint, headers=headers, json=payload, stream=True, timeout=60
-        ) as response:
-            response.raise_for_status()
+        while True:
+            endpoint = pool.acquire(exclude=tried, affinity_key=affinity_key)
+            tried.append(endpoint)
+            produced = False
 
-            if not response.encoding or response.encoding.lower() == "iso-8859-1":
-                response.encoding = "utf-8"
-                
-            for line in response.iter_lines(decode_unicode=True):
-                if not line:
-                    continue
-                if line.startswith("data:"):
-                    line = line[len("data:") :].strip()
-                if line == "[DONE]":
-                    break
+            try:
+                async for content in _stream_llama_endpoint(endpoint, headers, payload):
+                    produced = True
+                    yield content
+            except httpx.HTTPError as e:
+                if not _is_endpoint_failure(e):
+                    raise
+                pool.record_failure(endpoint, str(e))
 
-                try:
-                    data = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
+                if produced or not pool.has_available() or len(tried) >= len(pool.endpoints):
+                    raise
+                logger.warning(f"llama-server {endpoint.url} failed ({e}); trying another.")
+                continue
+            finally:
+                pool.release(endpoint)
 
-                choice = data.get("choices", [{}])[0]
-                delta = choice.get("delta") or choice.get("message") or {}
-                content = delta.get("content")
-                
-                if content:
-                    yield content
-    except requests.RequestException as e:
+            pool.record_success(endpoint)
+            return
+    except httpx.HTTPError as e:
         raise Exception(f"Llama server request failed: {e}")
     except Exception as e:
         raise Exception(f"Llama server inference failed: {e}")
 
 
-def call_groq_inference(prompt: list) -> str:
+async def probe_llama_endpoints() -> None:
     """
-    Call the third-party inference service (Groq) to get a summary.
+    Check every llama-server endpoint's /health and update its circuit breaker.
     """
+    pool = get_llama_pool()
+
+    for endpoint in pool.endpoints:
+        try:
+            response = await _get_llama_client(endpoint.url).get(
+                "/health", timeout=config.LLAMA_HEALTH_CHECK_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            pool.record_failure(endpoint, f"health check: {e}")
+        else:
+            pool.record_success(endpoint)
+
+
+async def run_llama_health_checks() -> None:
+    """
+    Probe the llama-server pool forever at LLAMA_HEALTH_CHECK_INTERVAL_SECONDS.
+    """
+    while True:
+        await probe_llama_endpoints()
+        await asyncio.sleep(config.LLAMA_HEALTH_CHECK_INTERVAL_SECONDS)
+
+
+async def warm_up_llama_endpoints(prompt: list) -> Dict[str, str]:
+    """
+    Send a one-token completion to every llama-server endpoint so the model and
+    prompt cache are hot before real traffic. Returns a status per endpoint URL.
+    """
+    llama_model = os.environ.get("LLAMA_SERVER_MODEL", config.LLAMA_SERVER_MODEL)
+    payload = {
+        "model": llama_model,
+        "messages": prompt,
+        "stream": True,
+        "max_tokens": 1,
+        "cache_prompt": config.LLAMA_CACHE_PROMPT,
+    }
+
+    async def warm_up(endpoint: LlamaEndpoint) -> str:
+        try:
+            async for _ in _stream_llama_endpoint(endpoint, _llama_headers(), payload):
+                pass
+        except httpx.HTTPError as e:
+            return f"failed: {e}"
+        return "ok"
+
+    endpoints = get_llama_pool().endpoints
+    results = await asyncio.gather(*(warm_up(endpoint) for endpoint in endpoints))
+    return {endpoint.url: result for endpoint, result in zip(endpoints, results)}
+
+
+async def warm_up_groq(prompt: list) -> None:
+    """
+    Build the shared Groq client and open its connection with a one-token completion.
+    """
+    await _get_groq_client().chat.completions.create(
+        messages=prompt, model=config.GROQ_MODEL, max_completion_tokens=1
+    )
+
+
+def _get_groq_client() -> AsyncGroq:
+    """
+    Return the shared Groq client, rebuilding it if the API key changed.
+    """
+    global _groq_client
+
     groq_api_key = os.environ.get("GROQ_API_KEY", config.GROQ_API_KEY)
-    client = Groq(api_key=groq_api_key)
 
+    if _groq_client is None or _groq_client.api_key != groq_api_key:
+        _groq_client = AsyncGroq(api_key=groq_api_key)
+
+    return _groq_client
+
+
+async def call_groq_inference(prompt: list) -> AsyncIterator[str]:
+    """
+    Call the third-party inference service (Groq) and stream the summary.
+    """
     try:
-        response = client.chat.completions.create(
-            messages=prompt, model=config.GROQ_MODEL, max_completion_tokens=8192
+        client = _get_groq_client()
+        stream = await client.chat.completions.create(
+            messages=prompt,
+            model=config.GROQ_MODEL,
+            max_completion_tokens=config.GROQ_MAX_COMPLETION_TOKENS,
+            stream=True,
         )
 
-        summary = response.choices[0].message.content
+        produced = False
+        finish_reason = None
+
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
 
-        if not summary:
+                choice = chunk.choices[0]
+                content = choice.delta.content if choice.delta else None
+
+                if content:
+                    produced = True
+                    yield content
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+        finally:
+            await stream.close()
+
+        if not produced:
             raise ValueError("No summary returned from Groq.")
-        return summary
+        if finish_reason is None:
+            raise ValueError("Groq stream ended before completion.")
     except Exception as e:
         raise Exception(f"Groq inference failed: {e}")
+
+
+def _provider_source(
+    prompt: list, use_local: bool, affinity_key: Optional[str]
+) -> AsyncIterator[str]:
+    if use_local:
+        return call_llama_server_inference(prompt, affinity_key)
+    return call_groq_inference(prompt)
+
+
+def _can_hedge_to(prompt: list, use_local: bool) -> bool:
+    if use_local:
+        available = get_llama_pool().has_available()
+    else:
+        available = bool(os.environ.get("GROQ_API_KEY", config.GROQ_API_KEY) and config.GROQ_MODEL)
+    if not available:
+        return False
+
+    # The prompt was fitted to the original provider's context, which may be larger
+    text = "\n".join(message["content"] for message in prompt)
+    return plan_prompt_budget("", text, use_local)["fits"]
+
+
+async def _hedged_inference(
+    prompt: list, use_local: bool, affinity_key: Optional[str], served_by: Dict[str, bool]
+) -> AsyncIterator[str]:
+    """
+    Stream from one provider, racing the other if the first chunk is slow.
+
+    If nothing arrives within HEDGE_DELAY_SECONDS, or the provider fails before
+    its first chunk, the prompt is also sent to the other provider when it has a
+    free admission slot. The first to produce a chunk is streamed and the other
+    request is cancelled.
+    """
+    names = {True: "llama-server", False: "groq"}
+    sources = {use_local: _provider_source(prompt, use_local, affinity_key)}
+    pending = {use_local: asyncio.ensure_future(sources[use_local].__anext__())}
+    errors = {}
+    hedge_limiter = None
+    hedge_tried = False
+    winner = None
+    first_chunk = None
+
+    try:
+        while winner is None:
+            timeout = None if hedge_tried else config.HEDGE_DELAY_SECONDS
+            done, _ = await asyncio.wait(
+                pending.values(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            # Check the original provider first so it wins ties
+            for provider in list(pending):
+                if pending[provider] not in done:
+                    continue
+
+                try:
+                    first_chunk = pending.pop(provider).result()
+                except StopAsyncIteration:
+                    winner = provider
+                    break
+                except Exception as e:
+                    errors[provider] = e
+                    continue
+
+                winner = provider
+                break
+
+            if winner is not None:
+                break
+
+            if not hedge_tried:
+                hedge_tried = True
+                hedge_limiter = get_limiter(not use_local)
+
+                if _can_hedge_to(prompt, not use_local) and hedge_limiter.try_acquire():
+                    logger.warning(
+                        f"No output from {names[use_local]} yet; hedging to {names[not use_local]}."
+                    )
+                    sources[not use_local] = _provider_source(prompt, not use_local, affinity_key)
+                    pending[not use_local] = asyncio.ensure_future(
+                        sources[not use_local].__anext__()
+                    )
+                else:
+                    hedge_limiter = None
+
+            if not pending:
+                raise errors.get(use_local) or errors[not use_local]
+
+        # Cancel the losing request before streaming the rest of the winner
+        for future in pending.values():
+            future.cancel()
+        await asyncio.gather(*pending.values(), return_exceptions=True)
+        pending.clear()
+
+        # A losing hedge gives its slot back now rather than when the winner finishes
+        if winner == use_local and hedge_limiter is not None:
+            hedge_limiter.release()
+            hedge_limiter = None
+
+        if len(sources) > 1:
+            HEDGED_GENERATIONS.inc(primary=names[use_local], winner=names[winner])
+            logger.info(f"Hedged generation won by {names[winner]}.")
+        served_by["use_local"] = winner
+
+        if first_chunk is None:
+            return
+        yield first_chunk
+
+        async for chunk in sources[winner]:
+            yield chunk
+    finally:
+        for future in pending.values():
+            future.cancel()
+        await asyncio.gather(*pending.values(), return_exceptions=True)
+
+        for source in sources.values():
+            await source.aclose()
+        if hedge_limiter is not None:
+            hedge_limiter.release()
+
+
+async def stream_inference(
+    prompt: list,
+    use_local: bool,
+    affinity_key: Optional[str] = None,
+    hedge: bool = False,
+    served_by: Optional[Dict[str, bool]] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream a summary from llama-server or Groq behind one async iterator.
+
+    `affinity_key` pins llama-server requests for the same video to the same
+    instance and slot; Groq ignores it. `hedge` allows racing the other
+    provider when HEDGE_ENABLED is set. If `served_by` is given, its
+    "use_local" entry is set to the provider actually streaming before the
+    first chunk is yielded.
+    """
+    if served_by is None:
+        served_by = {}
+    served_by["use_local"] = use_local
+
+    if hedge and config.HEDGE_ENABLED:
+        source = _hedged_inference(prompt, use_local, affinity_key, served_by)
+    else:
+        source = _provider_source(prompt, use_local, affinity_key)
+
+    async for chunk in source:
+        yield chunk
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+_JOB_COLUMNS = (
+    "id, video_url, use_local, status, attempts, max_attempts, next_run_at, "
+    "created_at, updated_at, result, error"
+)
+
+
+class JobQueue:
+    """
+    Persistent summarization job queue backed by SQLite.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                video_url TEXT NOT NULL,
+                use_local INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL,
+                next_run_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                result TEXT,
+                error TEXT
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, next_run_at)"
+        )
+        self._conn.commit()
+
+    def _row_to_job(self, row) -> Dict[str, Any]:
+        names = [name.strip() for name in _JOB_COLUMNS.split(",")]
+        job = dict(zip(names, row))
+        # "auto" is stored as text; explicit providers as 0 or 1
+        if job["use_local"] != "auto":
+            job["use_local"] = bool(job["use_local"])
+        return job
+
+    def submit(self, video_url: str, use_local: Union[bool, str]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, video_url, use_local, status, attempts, max_attempts, "
+                "next_run_at, created_at, updated_at) VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    video_url,
+                    use_local if use_local == "auto" else int(use_local),
+                    JOB_QUEUED,
+                    self.max_attempts,
+                    now,
+                    now,
+                    now,
+                ),
+            )
+            self._conn.commit()
+
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+
+        return self._row_to_job(row) if row is not None else None
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Mark the oldest ready job as running and return it.
+        """
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE status = ? AND next_run_at <= ? "
+                "ORDER BY next_run_at, created_at LIMIT 1",
+                (JOB_QUEUED, now),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            job = self._row_to_job(row)
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (JOB_RUNNING, now, job["id"]),
+            )
+            self._conn.commit()
+
+        job["status"] = JOB_RUNNING
+        job["attempts"] += 1
+        return job
+
+    def complete(self, job_id: str, result: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (JOB_SUCCEEDED, result, time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def fail(self, job_id: str, error: str) -> Dict[str, Any]:
+        """
+        Record a failed attempt, rescheduling with exponential backoff while attempts remain.
+        """
+        job = self.get(job_id)
+        if job is None:
+            raise ValueError(f"Unknown job: {job_id}")
+
+        now = time.time()
+
+        if job["attempts"] < job["max_attempts"]:
+            delay = min(
+                self.retry_max_seconds,
+                self.retry_base_seconds * (2 ** max(0, job["attempts"] - 1)),
+            )
+            status, next_run_at = JOB_QUEUED, now + delay
+        else:
+            status, next_run_at = JOB_FAILED, job["next_run_at"]
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, next_run_at = ?, updated_at = ? WHERE id = ?",
+                (status, error, next_run_at, now, job_id),
+            )
+            self._conn.commit()
+
+        return self.get(job_id)
+
+    def recover(self) -> int:
+        """
+        Requeue jobs that were running when the process last stopped.
+        """
+        now = time.time()
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, next_run_at = ?, updated_at = ? WHERE status = ?",
+                (JOB_QUEUED, now, now, JOB_RUNNING),
+            )
+            self._conn.commit()
+
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorkerPool:
+    """
+    Pool of asyncio workers that drain a JobQueue with a job handler.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[Dict[str, Any]], Awaitable[str]],
+        workers: int,
+        poll_interval_seconds: float,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.poll_interval_seconds = poll_interval_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        recovered = self.queue.recover()
+        if recovered:
+            logger.info(f"Recovered {recovered} unfinished jobs.")
+
+        self._tasks = [
+            asyncio.ensure_future(self._work(index)) for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+        # Jobs interrupted here stay "running" and are requeued by recover() on the next start
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def _work(self, index: int) -> None:
+        while True:
+            job = self.queue.claim()
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            logger.info(f"Worker {index} running job {job['id']} (attempt {job['attempts']}).")
+
+            try:
+                result = await self.handler(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job = self.queue.fail(job["id"], str(e))
+                logger.error(f"Job {job['id']} failed ({job['status']}): {e}")
+            else:
+                self.queue.complete(job["id"], result)
+                logger.info(f"Job {job['id']} succeeded.")
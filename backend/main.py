@@ -1,19 +1,97 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, HttpUrl
-from transcript_extractor import get_video_context
-from inference import call_groq_inference, call_llama_server_inference
-import tiktoken
+from typing import AsyncIterator, List, Literal, Optional, Union
+from transcript_extractor import extract_video_id, get_video_context_async
+from inference import close_inference_clients, run_llama_health_checks, stream_inference
+from routing import get_llama_pool
+from cache import get_summary_cache, summary_cache_key
+from streams import SingleFlight
+from streaming import STREAM_MEDIA_TYPES, coalesce_chunks, frame_stream, stop_on_disconnect
+from prompts import build_prompt, load_prompt_template
+from mapreduce import build_reduce_prompt
+from tokens import count_tokens, estimate_tokens, fit_transcript, plan_prompt_budget
+from jobs import JOB_FAILED, JOB_SUCCEEDED, JobQueue, JobWorkerPool
+from admission import AdmissionRejected, admission_stats, get_limiter
+from selection import choose_provider, record_generation, selection_stats
+from warmup import readiness, warm_up
+from metrics import (
+    CACHE_REQUESTS,
+    ERRORS,
+    GENERATIONS_CANCELLED,
+    GENERATION_SECONDS,
+    PROMPT_BUILD_SECONDS,
+    TIME_TO_FIRST_TOKEN_SECONDS,
+    TOKENS_PER_SECOND,
+    Collector,
+    register,
+    render_metrics,
+)
+import config
 import uvicorn
+import asyncio
+import json
 import logging
-import os
+import time
+from contextlib import asynccontextmanager, nullcontext
 
 # Set up basic logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+# Background summarization jobs, created on startup when enabled
+_job_queue: Optional[JobQueue] = None
+_job_workers: Optional[JobWorkerPool] = None
+
+
+# Start warm-up, job workers and llama-server health checks on startup; stop them
+# and release pooled connections on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _job_queue, _job_workers
+
+    # Warm up in the background so /healthz answers while /readyz reports progress
+    warmup_task = asyncio.ensure_future(warm_up())
+
+    health_checks = None
+    if get_llama_pool().endpoints:
+        health_checks = asyncio.ensure_future(run_llama_health_checks())
+
+    if config.JOBS_ENABLED:
+        _job_queue = JobQueue(
+            config.JOBS_DB_PATH,
+            max_attempts=config.JOB_MAX_ATTEMPTS,
+            retry_base_seconds=config.JOB_RETRY_BASE_SECONDS,
+            retry_max_seconds=config.JOB_RETRY_MAX_SECONDS,
+        )
+        _job_workers = JobWorkerPool(
+            _job_queue,
+            _run_summary_job,
+            workers=config.JOB_WORKERS,
+            poll_interval_seconds=config.JOB_POLL_INTERVAL_SECONDS,
+        )
+        _job_workers.start()
+
+    yield
+
+    warmup_task.cancel()
+    await asyncio.gather(warmup_task, return_exceptions=True)
+
+    if health_checks is not None:
+        health_checks.cancel()
+        await asyncio.gather(health_checks, return_exceptions=True)
+
+    if _job_workers is not None:
+        await _job_workers.stop()
+        _job_queue.close()
+        _job_workers = _job_queue = None
+
+    await close_inference_clients()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS middleware
 app.add_middleware(
@@ -22,79 +100,688 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all HTTP methods (including OPTIONS)
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Stream-Id"],  # Lets the extension read the ID needed to resume a stream
+)
+
+
+# Identical in-flight requests share one context fetch and one generation; finished
+# streams are kept for a while so disconnected clients can resume them
+_inflight = SingleFlight(
+    detach_grace_seconds=config.STREAM_DETACH_GRACE_SECONDS,
+    retention_seconds=config.STREAM_RETENTION_SECONDS,
+    retention_max_entries=config.STREAM_RETENTION_MAX_ENTRIES,
+    retention_max_bytes=config.STREAM_RETENTION_MAX_BYTES,
+)
+_context_tasks = {}
+
+
+# Admission and routing state is exported to /metrics, read at scrape time
+def _register_stats_metric(name: str, documentation: str, source: str, field: str, kind: str = "gauge"):
+    if source == "admission":
+        label = "provider"
+        collect = lambda: [
+            ((provider,), stats[field]) for provider, stats in admission_stats().items()
+        ]
+    else:
+        label = "endpoint"
+        collect = lambda: [
+            ((endpoint["url"],), float(endpoint[field])) for endpoint in get_llama_pool().stats()
+        ]
+
+    register(Collector(name, documentation, [label], collect, kind=kind))
+
+
+_register_stats_metric(
+    "summarizer_admission_in_flight", "Generations holding an admission slot.", "admission", "in_flight"
+)
+_register_stats_metric(
+    "summarizer_admission_queued", "Requests waiting for an admission slot.", "admission", "queued"
+)
+_register_stats_metric(
+    "summarizer_admission_rejected_total",
+    "Requests rejected by admission control.",
+    "admission",
+    "rejected",
+    kind="counter",
+)
+_register_stats_metric(
+    "summarizer_llama_endpoint_outstanding",
+    "Outstanding requests per llama-server endpoint.",
+    "routing",
+    "outstanding",
+)
+_register_stats_metric(
+    "summarizer_llama_endpoint_available",
+    "Whether a llama-server endpoint is taking traffic.",
+    "routing",
+    "available",
 )
 
 
 # Preparing request parameters
 class SummarizationRequest(BaseModel):
     video_url: HttpUrl
-    use_local: bool
+    use_local: Union[bool, Literal["auto"]]
+    stream_format: Literal["text", "ndjson", "sse"] = "text"
+
+
+class BatchSummarizationRequest(BaseModel):
+    video_urls: List[HttpUrl]
+    use_local: Union[bool, Literal["auto"]]
+    concurrency: Optional[int] = None
+    extract_concurrency: Optional[int] = None
+
+
+def _provider_key(use_local: bool) -> str:
+    if use_local:
+        return f"llama-server:{config.LLAMA_SERVER_MODEL}"
+    return f"groq:{config.GROQ_MODEL}"
+
+
+def _provider_name(use_local: Union[bool, str]) -> str:
+    return "auto" if use_local == "auto" else get_limiter(use_local).provider
+
+
+def _candidate_providers(use_local: Union[bool, str]) -> List[bool]:
+    # An "auto" request can reuse a summary or generation from either provider
+    return [True, False] if use_local == "auto" else [use_local]
+
+
+def _prompt_fields(context: dict) -> dict:
+    return {
+        "title": context.get("title", ""),
+        "channel": context.get("channel", ""),
+        "duration_seconds": context.get("duration_seconds", 0),
+    }
+
 
+def _failover_provider(use_local: bool) -> bool:
+    """
+    Return Groq (False) for a llama-server request while every endpoint is ejected and
+    LLAMA_FAILOVER_TO_GROQ is set, otherwise the requested provider.
+    """
+    if use_local and config.LLAMA_FAILOVER_TO_GROQ and not get_llama_pool().has_available():
+        return False
+    return use_local
 
-def _escape_format_value(value) -> str:
-    text = "" if value is None else str(value)
-    return text.replace("{", "{{").replace("}", "}}")
+
+def _resolve_provider(use_local: Union[bool, str], prompt_template: str, context: dict) -> bool:
+    """
+    Return the provider to generate with, picking one from prompt size and load for "auto".
+    """
+    if use_local != "auto":
+        return use_local
+
+    budget = plan_prompt_budget(
+        prompt_template, context.get("transcript", ""), True, **_prompt_fields(context)
+    )
+    return choose_provider(budget["prompt_tokens"])
+
+
+async def _get_video_context_coalesced(video_id: str, video_url: str) -> dict:
+    task = _context_tasks.get(video_id)
+
+    if task is None:
+        task = asyncio.ensure_future(get_video_context_async(video_url))
+        _context_tasks[video_id] = task
+        task.add_done_callback(lambda _: _context_tasks.pop(video_id, None))
+
+    # Shield so one caller leaving does not cancel the fetch for the others
+    return await asyncio.shield(task)
+
+
+def _prepare_prompt(prompt_template: str, context: dict, use_local: bool):
+    """
+    Fit the transcript to the backend's token budget and build the prompt.
+
+    Returns the prompt, the transcript it was built from and whether the
+    transcript is long enough to need map-reduce.
+    """
+    transcript = context.get("transcript", "")
+    fields = _prompt_fields(context)
+    budget = plan_prompt_budget(prompt_template, transcript, use_local, **fields)
+
+    # Long transcripts go through map-reduce; anything else is trimmed to fit up front
+    long_video = config.LONG_VIDEO_MODE_ENABLED and (
+        budget["prompt_tokens"] > config.LONG_VIDEO_THRESHOLD_TOKENS or not budget["fits"]
+    )
+    if not long_video:
+        transcript, budget = fit_transcript(prompt_template, transcript, use_local, **fields)
+
+    logger.info(f"Prompt token budget: {budget}.")
+    return build_prompt(prompt_template, transcript, **fields), transcript, long_video
+
+
+async def _generate_summary(
+    prompt: list,
+    prompt_template: str,
+    transcript: str,
+    context: dict,
+    use_local: bool,
+    long_video: bool,
+    cache_key: str,
+    video_id: str,
+    hedge: bool,
+):
+    chunks = []
+    provider = get_limiter(use_local).provider
+    served_by = {"use_local": use_local}
+    started = time.monotonic()
+    first_chunk_at = None
+
+    try:
+        # Long transcripts are summarized in parts first, then reduced in one streamed pass
+        if long_video:
+            logger.info("Long video mode: summarizing transcript in parts.")
+            prompt = await build_reduce_prompt(prompt_template, transcript, context, use_local)
+
+        logger.info("llama-server called." if use_local else "Groq called.")
+        # The video ID keeps repeat summaries on the llama-server slot that has its prompt cached
+        async for chunk in stream_inference(
+            prompt, use_local, affinity_key=video_id, hedge=hedge, served_by=served_by
+        ):
+            if first_chunk_at is None:
+                first_chunk_at = time.monotonic()
+                # A hedged generation may be streamed by the other provider
+                provider = get_limiter(served_by["use_local"]).provider
+                TIME_TO_FIRST_TOKEN_SECONDS.observe(first_chunk_at - started, provider=provider)
+            chunks.append(chunk)
+            yield chunk
+    except asyncio.CancelledError:
+        # Every client left, so the upstream request is being torn down with this task
+        GENERATIONS_CANCELLED.inc(provider=provider)
+        logger.info(
+            f"Generation for {video_id} cancelled after {time.monotonic() - started:.2f}s "
+            f"and {len(chunks)} chunks."
+        )
+        raise
+    except Exception:
+        ERRORS.inc(stage="generation", provider=provider)
+        raise
+
+    finished = time.monotonic()
+    GENERATION_SECONDS.observe(finished - started, provider=provider)
+    if first_chunk_at is not None and finished > first_chunk_at:
+        output_tokens = count_tokens("".join(chunks))
+        TOKENS_PER_SECOND.observe(output_tokens / (finished - first_chunk_at), provider=provider)
+
+        # Map-reduce timings span several calls, so only single-pass generations feed auto mode
+        if not long_video:
+            record_generation(
+                served_by["use_local"],
+                sum(estimate_tokens(message["content"]) for message in prompt),
+                first_chunk_at - started,
+                output_tokens,
+                finished - first_chunk_at,
+            )
+    logger.info("Summary generated.")
+
+    # Only completed generations reach here, so partial output is never cached
+    summary_cache = get_summary_cache()
+    if summary_cache is not None:
+        if served_by["use_local"] != use_local:
+            cache_key = summary_cache_key(
+                video_id, _provider_key(served_by["use_local"]), prompt_template
+            )
+        summary_cache.set(cache_key, "".join(chunks))
+
+
+async def _start_generation(
+    video_id: str,
+    prompt_template: str,
+    context: dict,
+    use_local: bool,
+    hedge: bool = False,
+):
+    """
+    Start a summary generation, or join one already running for the same key.
+
+    New generations hold one of the provider's admission slots until they finish.
+    Raises AdmissionRejected when the provider is saturated. `hedge` lets an
+    interactive generation race the other provider if its first token is slow.
+    """
+    # Fail over before admission so the generation is queued, cached and labelled as Groq
+    provider = _failover_provider(use_local)
+    if provider != use_local:
+        logger.warning("No healthy llama-server endpoint; failing over to Groq.")
+        use_local = provider
+
+    cache_key = summary_cache_key(video_id, _provider_key(use_local), prompt_template)
+    flight = _inflight.get(cache_key)
+    if flight is not None:
+        return flight
+
+    limiter = get_limiter(use_local)
+    if not limiter.try_acquire():
+        # Generations every client has left only hold slots for a possible resume;
+        # give the oldest one's slot to this live request instead of queueing behind it
+        if _inflight.cancel_detached(limiter.provider, count=1):
+            logger.info(f"Reclaimed a detached {limiter.provider} generation for a waiting request.")
+        await limiter.acquire()
+
+    # An identical request may have started generating while this one was queued
+    flight = _inflight.get(cache_key)
+    if flight is not None:
+        limiter.release()
+        return flight
+
+    started = time.monotonic()
+
+    try:
+        prompt, transcript, long_video = _prepare_prompt(prompt_template, context, use_local)
+        PROMPT_BUILD_SECONDS.observe(time.monotonic() - started, provider=limiter.provider)
+        flight = _inflight.get_or_start(
+            cache_key,
+            lambda: _generate_summary(
+                prompt,
+                prompt_template,
+                transcript,
+                context,
+                use_local,
+                long_video,
+                cache_key,
+                video_id,
+                hedge,
+            ),
+            group=limiter.provider,
+        )
+    except Exception:
+        limiter.release()
+        raise
+
+    flight.add_done_callback(lambda _: limiter.release(time.monotonic() - started))
+    return flight
+
+
+async def _replay(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+def _summary_response(
+    source: AsyncIterator[str],
+    stream_format: str,
+    cached: bool = False,
+    stream_id: Optional[str] = None,
+    http_request: Optional[Request] = None,
+) -> StreamingResponse:
+    """
+    Stream summary text with batched writes, framed if the client asked for it.
+
+    Generated streams carry their stream ID in the X-Stream-Id header, and end
+    as soon as `http_request`'s client disconnects.
+    """
+    chunks = coalesce_chunks(
+        source, config.STREAM_FLUSH_MAX_CHARS, config.STREAM_FLUSH_INTERVAL_SECONDS
+    )
+    body = frame_stream(chunks, stream_format, cached=cached)
+    if http_request is not None:
+        body = stop_on_disconnect(
+            body, http_request.is_disconnected, config.STREAM_DISCONNECT_POLL_SECONDS
+        )
+
+    return StreamingResponse(
+        body,
+        media_type=STREAM_MEDIA_TYPES[stream_format],
+        headers={"X-Stream-Id": stream_id} if stream_id else None,
+    )
+
+
+def _too_many_requests(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+def _check_provider_available(use_local: bool) -> None:
+    """
+    Fail fast before doing any work when the provider cannot take the request.
+    """
+    use_local = _failover_provider(use_local)
+    limiter = get_limiter(use_local)
+    if limiter.is_saturated():
+        raise _too_many_requests(limiter.reject("wait queue is full"))
+
+    llama_pool = get_llama_pool()
+    if (
+        use_local
+        and not config.LLAMA_FAILOVER_TO_GROQ
+        and llama_pool.endpoints
+        and not llama_pool.has_available()
+    ):
+        raise HTTPException(
+            status_code=503, detail="No healthy llama-server endpoint is available."
+        )
+
+
+async def _summarize_to_text(
+    video_url: str,
+    use_local: Union[bool, str],
+    prompt_template: str,
+    extract_slots: Optional[asyncio.Semaphore] = None,
+    inference_slots: Optional[asyncio.Semaphore] = None,
+):
+    """
+    Produce a complete summary for one video, reusing the cache and in-flight generations.
+
+    Returns the summary and whether it came from the cache.
+    """
+    video_id = extract_video_id(video_url)
+    cache_keys = {
+        provider: summary_cache_key(video_id, _provider_key(provider), prompt_template)
+        for provider in _candidate_providers(use_local)
+    }
+    summary_cache = get_summary_cache()
+
+    def cached_summary(record: bool = True):
+        if summary_cache is None:
+            return None
+
+        for cache_key in cache_keys.values():
+            summary = summary_cache.get(cache_key)
+            if summary is not None:
+                if record:
+                    CACHE_REQUESTS.inc(cache="summary", result="hit")
+                return summary
+
+        if record:
+            CACHE_REQUESTS.inc(cache="summary", result="miss")
+        return None
+
+    summary = cached_summary()
+    if summary is not None:
+        return summary, True
+
+    async with extract_slots or nullcontext():
+        context = await _get_video_context_coalesced(video_id, video_url)
+
+    async with inference_slots or nullcontext():
+        # An identical request may have finished while this one waited; the first
+        # lookup already counted this request's miss
+        summary = cached_summary(record=False)
+        if summary is not None:
+            return summary, True
+
+        use_local = _resolve_provider(use_local, prompt_template, context)
+        flight = await _start_generation(video_id, prompt_template, context, use_local)
+        return "".join([chunk async for chunk in flight.subscribe()]), False
+
+
+async def _run_summary_job(job: dict) -> str:
+    summary, _ = await _summarize_to_text(
+        job["video_url"], job["use_local"], load_prompt_template()
+    )
+    return summary
+
+
+def _job_status(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "video_url": job["video_url"],
+        "use_local": job["use_local"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "error": job["error"],
+    }
 
 
 # POST request to create summary
 @app.post("/summarize")
-async def summarize_video(request: SummarizationRequest):
+async def summarize_video(request: SummarizationRequest, http_request: Request):
 
     # Logging request
     logger.info(f"Received summarization request: {request}")
     logger.info(f"Received video URL: {request.video_url}")
     logger.info(f"Received provider: {request.use_local}")
 
+    # Look up a previously generated summary
+    try:
+        video_id = extract_video_id(request.video_url)
+        prompt_template = load_prompt_template()
+    except ValueError as e:
+        logger.error(f"Transcript error: {e}")
+        raise HTTPException(status_code=400, detail=f"Transcript error: {str(e)}")
+    except Exception as e:
+        logger.error(f"Prompt setup error: {e}")
+        raise HTTPException(status_code=500, detail=f"Prompt setup error: {str(e)}")
+
+    summary_cache = get_summary_cache()
+    use_local = request.use_local
+    cache_keys = {
+        provider: summary_cache_key(video_id, _provider_key(provider), prompt_template)
+        for provider in _candidate_providers(use_local)
+    }
+
+    if summary_cache is not None:
+        for cache_key in cache_keys.values():
+            cached_summary = summary_cache.get(cache_key)
+            if cached_summary is not None:
+                logger.info(f"Summary cache hit for {video_id}.")
+                CACHE_REQUESTS.inc(cache="summary", result="hit")
+                return _summary_response(
+                    _replay(cached_summary), request.stream_format, cached=True
+                )
+        CACHE_REQUESTS.inc(cache="summary", result="miss")
+
+    # Join an identical generation that is already running
+    for cache_key in cache_keys.values():
+        flight = _inflight.get(cache_key)
+        if flight is not None:
+            logger.info(f"Joining in-flight summary for {video_id}.")
+            return _summary_response(
+                flight.subscribe(),
+                request.stream_format,
+                stream_id=flight.stream_id,
+                http_request=http_request,
+            )
+
+    # Fast-fail before fetching anything when the provider cannot take more work;
+    # auto mode skips unavailable providers when it picks one
+    if use_local != "auto":
+        _check_provider_available(use_local)
+
     # Retrieve transcript
     try:
-        context = get_video_context(request.video_url)
-        transcript = context.get("transcript", "")
-        title = context.get("title", "")
-        channel = context.get("channel", "")
-        duration_seconds = context.get("duration_seconds", 0)
-        logger.info(f"Transcript obtained successfully: {transcript[:50]}...")
+        context = await _get_video_context_coalesced(video_id, request.video_url)
+        logger.info(f"Transcript obtained successfully: {context.get('transcript', '')[:50]}...")
     except Exception as e:
         logger.error(f"Transcript error: {e}")
+        ERRORS.inc(stage="context", provider=_provider_name(use_local))
         raise HTTPException(status_code=400, detail=f"Transcript error: {str(e)}")
+
+    # Pick a provider for auto mode now that the prompt size is known
+    if use_local == "auto":
+        try:
+            use_local = _resolve_provider(use_local, prompt_template, context)
+        except Exception as e:
+            logger.error(f"Prompt setup error: {e}")
+            ERRORS.inc(stage="prompt", provider="auto")
+            raise HTTPException(status_code=500, detail=f"Prompt setup error: {str(e)}")
+        _check_provider_available(use_local)
 
-    # Set up prompt
+    # Set up prompt and start the generation, or join one started while the context was fetched
     try:
-        current_directory = os.path.dirname(os.path.abspath(__file__))
-        prompt_file_path = os.path.join(current_directory, "prompt.txt")
+        flight = await _start_generation(
+            video_id, prompt_template, context, use_local, hedge=True
+        )
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+    except Exception as e:
+        logger.error(f"Prompt setup error: {e}")
+        ERRORS.inc(stage="prompt", provider=_provider_name(use_local))
+        raise HTTPException(status_code=500, detail=f"Prompt setup error: {str(e)}")
 
-        with open(prompt_file_path, "r", encoding="utf-8") as file:
-            prompt_template = file.read()
-
-        content = prompt_template.format(
-            title=_escape_format_value(title),
-            channel=_escape_format_value(channel),
-            duration_seconds=duration_seconds,
-            transcript=_escape_format_value(transcript),
-        )
-        encoding = tiktoken.get_encoding("cl100k_base")
-        tokens = encoding.encode(content)
-        logger.info(f"Approximate token count: {int(len(tokens) * 1.15)}.")
+    # Return a streaming response
+    return _summary_response(
+        flight.subscribe(),
+        request.stream_format,
+        stream_id=flight.stream_id,
+        http_request=http_request,
+    )
 
-        prompt = [{"role": "user", "content": content}]
+
+# GET request to resume a running or recently finished summary stream
+@app.get("/summarize/stream/{stream_id}")
+async def resume_summary_stream(
+    stream_id: str,
+    http_request: Request,
+    offset: int = 0,
+    stream_format: Literal["text", "ndjson", "sse"] = "text",
+):
+    flight = _inflight.get_stream(stream_id)
+    if flight is None:
+        raise HTTPException(status_code=404, detail="Stream not found or expired.")
+
+    logger.info(f"Resuming stream {stream_id} from offset {offset}.")
+    return _summary_response(
+        flight.subscribe(offset), stream_format, stream_id=stream_id, http_request=http_request
+    )
+
+
+# POST request to summarize many videos, streaming one NDJSON record per video
+@app.post("/summarize/batch")
+async def summarize_batch(request: BatchSummarizationRequest):
+    logger.info(f"Received batch summarization request for {len(request.video_urls)} videos.")
+
+    if not request.video_urls:
+        raise HTTPException(status_code=400, detail="No video URLs provided.")
+    if len(request.video_urls) > config.BATCH_MAX_VIDEOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many video URLs; the limit is {config.BATCH_MAX_VIDEOS}.",
+        )
+
+    try:
+        prompt_template = load_prompt_template()
     except Exception as e:
         logger.error(f"Prompt setup error: {e}")
         raise HTTPException(status_code=500, detail=f"Prompt setup error: {str(e)}")
 
-    # Define a generator to stream for llama-server or whole for Groq
-    def generate():
-        if request.use_local:
-            logger.info("llama-server called.")
-            for chunk in call_llama_server_inference(prompt):
-                yield chunk
-        else:
-            logger.info(f"Groq called.")
-            summary = call_groq_inference(prompt)
-            logger.info(f"Groq summary generated.")
-            yield summary
+    use_local = request.use_local
+    concurrency = min(
+        max(1, request.concurrency or config.BATCH_DEFAULT_CONCURRENCY),
+        config.BATCH_MAX_CONCURRENCY,
+    )
+    extract_concurrency = min(
+        max(1, request.extract_concurrency or config.BATCH_DEFAULT_EXTRACT_CONCURRENCY),
+        config.BATCH_MAX_CONCURRENCY,
+    )
+    inference_slots = asyncio.Semaphore(concurrency)
+    extract_slots = asyncio.Semaphore(extract_concurrency)
 
-    # Return a streaming response
-    return StreamingResponse(generate(), media_type="text/plain")
+    async def summarize_one(index: int, video_url: str) -> dict:
+        record = {"index": index, "video_url": video_url}
+
+        try:
+            record["video_id"] = extract_video_id(video_url)
+            summary, cached = await _summarize_to_text(
+                video_url, use_local, prompt_template, extract_slots, inference_slots
+            )
+            record.update(status="ok", cached=cached, summary=summary)
+        except Exception as e:
+            logger.error(f"Batch item {index} failed: {e}")
+            record.update(status="error", error=str(e))
+
+        return record
+
+    async def generate():
+        tasks = [
+            asyncio.ensure_future(summarize_one(index, str(video_url)))
+            for index, video_url in enumerate(request.video_urls)
+        ]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                record = await next_done
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+# GET request for liveness
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+# GET request for readiness; 503 until startup warm-up has finished
+@app.get("/readyz")
+async def readyz():
+    status = readiness()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+# GET request for per-provider admission queue depth and wait times
+@app.get("/admission")
+async def get_admission_stats():
+    return admission_stats()
+
+
+# GET request for llama-server pool load and circuit-breaker state
+@app.get("/routing")
+async def get_routing_stats():
+    return {"llama-server": get_llama_pool().stats(), "auto": selection_stats()}
+
+
+# GET request for Prometheus metrics
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+def _get_job_queue() -> JobQueue:
+    if _job_queue is None:
+        raise HTTPException(status_code=503, detail="Background jobs are disabled.")
+    return _job_queue
+
+
+# POST request to queue a summary as a background job
+@app.post("/jobs", status_code=202)
+async def submit_job(request: SummarizationRequest):
+    queue = _get_job_queue()
+
+    try:
+        extract_video_id(request.video_url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Transcript error: {str(e)}")
+
+    job = queue.submit(str(request.video_url), request.use_local)
+    _job_workers.notify()
+    logger.info(f"Queued job {job['id']} for {request.video_url}.")
+    return _job_status(job)
+
+
+# GET request for a background job's status
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = _get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return _job_status(job)
+
+
+# GET request for a background job's summary
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = _get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    if job["status"] == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=f"Job failed: {job['error']}")
+    if job["status"] != JOB_SUCCEEDED:
+        return JSONResponse(status_code=202, content=_job_status(job))
+
+    return {**_job_status(job), "summary": job["result"]}
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(
+        "main:app" if config.SERVER_RELOAD else app,
+        host=config.SERVER_HOST,
+        port=config.SERVER_PORT,
+        reload=config.SERVER_RELOAD,
+    )
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from collections import deque
+from typing import List, Optional
+
+from admission import get_limiter
+from inference import stream_inference
+from prompts import build_prompt, load_prompt_template
+from tokens import fit_transcript, get_encoding, plan_prompt_budget
+import config
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def split_transcript(transcript: str, chunk_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """
+    Split a transcript into chunks of at most `chunk_tokens` tokens.
+    """
+    encoding = get_encoding()
+    tokens = encoding.encode(transcript)
+    chunk_tokens = max(1, chunk_tokens)
+    step = max(1, chunk_tokens - max(0, overlap_tokens))
+
+    chunks = []
+    for start in range(0, len(tokens), step):
+        chunks.append(encoding.decode(tokens[start : start + chunk_tokens]).strip())
+        if start + chunk_tokens >= len(tokens):
+            break
+
+    return [chunk for chunk in chunks if chunk]
+
+
+async def _summarize_chunk(prompt: list, use_local: bool, part: int) -> str:
+    logger.info(f"Summarizing transcript part {part}.")
+    pieces = []
+    async for piece in stream_inference(prompt, use_local):
+        pieces.append(piece)
+
+    notes = "".join(pieces).strip()
+    if not notes:
+        raise ValueError(f"No notes returned for transcript part {part}.")
+    return notes
+
+
+async def map_transcript(
+    chunks: List[str], context: dict, use_local: bool, parallelism: int
+) -> List[str]:
+    """
+    Summarize transcript chunks in parallel and return the notes in order.
+
+    The calling generation's admission slot covers one map call at a time. Each
+    further concurrent call needs a free slot from the provider's limiter, so a
+    long video never sends more requests than the provider admits.
+    """
+    chunk_template = load_prompt_template("chunk_prompt.txt")
+    limiter = get_limiter(use_local)
+    prompts = [
+        build_prompt(
+            chunk_template,
+            chunk,
+            title=context.get("title", ""),
+            channel=context.get("channel", ""),
+            duration_seconds=context.get("duration_seconds", 0),
+            part=index,
+            parts=len(chunks),
+        )
+        for index, chunk in enumerate(chunks, start=1)
+    ]
+    notes: List[Optional[str]] = [None] * len(prompts)
+    remaining = deque(range(len(prompts)))
+
+    async def worker(holds_slot: bool) -> None:
+        while remaining:
+            # Extra workers only run while the provider has spare capacity
+            if not holds_slot and not limiter.try_acquire():
+                return
+
+            index = remaining.popleft()
+            try:
+                notes[index] = await _summarize_chunk(prompts[index], use_local, index + 1)
+            finally:
+                if not holds_slot:
+                    limiter.release()
+
+    workers = max(1, min(parallelism, len(prompts)))
+    tasks = [asyncio.ensure_future(worker(number == 0)) for number in range(workers)]
+
+    try:
+        # The first failure fails the generation and frees its slot, so stop every
+        # other worker before any more map calls go upstream
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return notes
+
+
+def _map_chunk_tokens(context: dict, use_local: bool) -> int:
+    # Never let a single part overflow the backend's context with the chunk prompt around it
+    budget = plan_prompt_budget(
+        load_prompt_template("chunk_prompt.txt"),
+        "",
+        use_local,
+        title=context.get("title", ""),
+        channel=context.get("channel", ""),
+    )
+    room = budget["available_prompt_tokens"] - budget["overhead_tokens"]
+    room = int(room / config.TOKEN_COUNT_SCALE)
+    return max(1, min(config.MAP_CHUNK_TOKENS, room))
+
+
+async def build_reduce_prompt(
+    prompt_template: str, transcript: str, context: dict, use_local: bool
+) -> list:
+    """
+    Run the map stage over a long transcript and build the final reduce prompt.
+
+    The reduce prompt is the regular prompt.txt with the transcript replaced by
+    the per-part notes, so the streamed output keeps the usual format.
+    """
+    chunks = split_transcript(
+        transcript,
+        chunk_tokens=_map_chunk_tokens(context, use_local),
+        overlap_tokens=config.MAP_CHUNK_OVERLAP_TOKENS,
+    )
+    logger.info(f"Long transcript split into {len(chunks)} parts.")
+
+    notes = await map_transcript(chunks, context, use_local, config.MAP_PARALLELISM)
+    merged_notes = "\n\n".join(
+        f"[Part {index} of {len(notes)}]\n{part_notes}"
+        for index, part_notes in enumerate(notes, start=1)
+    )
+
+    fields = {
+        "title": context.get("title", ""),
+        "channel": context.get("channel", ""),
+        "duration_seconds": context.get("duration_seconds", 0),
+    }
+    merged_notes, budget = fit_transcript(prompt_template, merged_notes, use_local, **fields)
+    logger.info(f"Reduce prompt budget: {budget}.")
+
+    return build_prompt(prompt_template, merged_notes, **fields)
@@ -0,0 +1,206 @@
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+DEFAULT_SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKENS_PER_SECOND_BUCKETS = (1.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0, 1000.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_SECONDS_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum and count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+
+        lines = self.header()
+        for key, (bucket_counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {repr(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Collector(_Metric):
+    """
+    Gauge or counter whose samples are read from a callback at scrape time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str],
+        collect: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]],
+        kind: str = "gauge",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.collect()
+        ]
+
+
+_registry: List[_Metric] = []
+
+
+def register(metric: _Metric) -> _Metric:
+    _registry.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+METADATA_FETCH_SECONDS = register(
+    Histogram("summarizer_metadata_fetch_seconds", "Time spent fetching video metadata.", ["outcome"])
+)
+TRANSCRIPT_FETCH_SECONDS = register(
+    Histogram("summarizer_transcript_fetch_seconds", "Time spent fetching transcripts.", ["outcome"])
+)
+PROMPT_BUILD_SECONDS = register(
+    Histogram(
+        "summarizer_prompt_build_seconds",
+        "Time spent budgeting, tokenizing and building prompts.",
+        ["provider"],
+    )
+)
+TIME_TO_FIRST_TOKEN_SECONDS = register(
+    Histogram(
+        "summarizer_time_to_first_token_seconds",
+        "Time from starting a generation to its first streamed chunk.",
+        ["provider"],
+    )
+)
+GENERATION_SECONDS = register(
+    Histogram("summarizer_generation_seconds", "Total generation time.", ["provider"])
+)
+TOKENS_PER_SECOND = register(
+    Histogram(
+        "summarizer_tokens_per_second",
+        "Streamed output tokens per second of generation.",
+        ["provider"],
+        buckets=TOKENS_PER_SECOND_BUCKETS,
+    )
+)
+CACHE_REQUESTS = register(
+    Counter("summarizer_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"])
+)
+HEDGED_GENERATIONS = register(
+    Counter(
+        "summarizer_hedged_generations_total",
+        "Generations that raced a second provider, by original and winning provider.",
+        ["primary", "winner"],
+    )
+)
+GENERATIONS_CANCELLED = register(
+    Counter(
+        "summarizer_generations_cancelled_total",
+        "Generations cancelled because every client disconnected.",
+        ["provider"],
+    )
+)
+ERRORS = register(
+    Counter("summarizer_errors_total", "Errors by pipeline stage and provider.", ["stage", "provider"])
+)
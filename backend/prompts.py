@@ -0,0 +1,31 @@
+import os
+from typing import Any
+
+PROMPT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def escape_format_value(value) -> str:
+    text = "" if value is None else str(value)
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def load_prompt_template(file_name: str = "prompt.txt") -> str:
+    """
+    Read a prompt template that lives next to this module.
+    """
+    prompt_file_path = os.path.join(PROMPT_DIRECTORY, file_name)
+
+    with open(prompt_file_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def build_prompt(template: str, transcript: str, **fields: Any) -> list:
+    """
+    Fill a prompt template and wrap it as a single user chat message.
+    """
+    values = {
+        name: value if isinstance(value, (int, float)) else escape_format_value(value)
+        for name, value in fields.items()
+    }
+    content = template.format(transcript=escape_format_value(transcript), **values)
+    return [{"role": "user", "content": content}]
@@ -0,0 +1,185 @@
+import hashlib
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+import config
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class NoHealthyEndpoint(ValueError):
+    """
+    Raised when every llama-server endpoint is ejected or the pool is empty.
+    """
+
+
+class LlamaEndpoint:
+    """
+    One llama-server instance with its load and circuit-breaker state.
+    """
+
+    def __init__(self, url: str, weight: float = 1.0):
+        self.url = url.rstrip("/")
+        self.weight = max(weight, 0.001)
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.healthy = True
+
+    def is_available(self, now: float) -> bool:
+        # After the cooldown the breaker is half-open and lets traffic through again
+        return self.open_until <= now
+
+    def load(self) -> float:
+        return (self.outstanding + 1) / self.weight
+
+
+def _hash_unit(text: str) -> float:
+    # Stable hash mapped into the open interval (0, 1)
+    digest = hashlib.sha1(text.encode("utf-8")).digest()
+    return (int.from_bytes(digest[:8], "big") + 1) / (2**64 + 2)
+
+
+def rendezvous_score(key: str, endpoint: LlamaEndpoint) -> float:
+    """
+    Weighted rendezvous (highest random weight) score of an endpoint for a key.
+    """
+    return -endpoint.weight / math.log(_hash_unit(f"{key}|{endpoint.url}"))
+
+
+def slot_for_key(key: str, slots: int) -> int:
+    """
+    Map a key to one of a llama-server's `slots` parallel slots.
+    """
+    return int(_hash_unit(key) * slots) % slots
+
+
+class LlamaPool:
+    """
+    Least-outstanding-requests router over weighted llama-server endpoints.
+
+    Requests with an affinity key prefer the same endpoint every time (rendezvous
+    hashing), so that instance's prompt cache can be reused, unless it has
+    `affinity_max_extra_outstanding` more requests than the least-loaded one.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[LlamaEndpoint],
+        failure_threshold: int,
+        cooldown_seconds: float,
+        affinity_max_extra_outstanding: int = 2,
+    ):
+        self.endpoints = endpoints
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self.affinity_max_extra_outstanding = max(0, affinity_max_extra_outstanding)
+
+    def available(self) -> List[LlamaEndpoint]:
+        now = time.monotonic()
+        return [endpoint for endpoint in self.endpoints if endpoint.is_available(now)]
+
+    def has_available(self) -> bool:
+        return bool(self.available())
+
+    def acquire(
+        self,
+        exclude: Optional[List[LlamaEndpoint]] = None,
+        affinity_key: Optional[str] = None,
+    ) -> LlamaEndpoint:
+        candidates = [
+            endpoint for endpoint in self.available() if endpoint not in (exclude or [])
+        ]
+        if not candidates:
+            raise NoHealthyEndpoint("No healthy llama-server endpoint is available.")
+
+        endpoint = min(candidates, key=lambda candidate: candidate.load())
+
+        if affinity_key and len(candidates) > 1:
+            preferred = max(
+                candidates, key=lambda candidate: rendezvous_score(affinity_key, candidate)
+            )
+            if preferred.outstanding <= endpoint.outstanding + self.affinity_max_extra_outstanding:
+                endpoint = preferred
+
+        endpoint.outstanding += 1
+        return endpoint
+
+    def release(self, endpoint: LlamaEndpoint) -> None:
+        endpoint.outstanding = max(0, endpoint.outstanding - 1)
+
+    def record_success(self, endpoint: LlamaEndpoint) -> None:
+        if endpoint.consecutive_failures or not endpoint.healthy:
+            logger.info(f"llama-server {endpoint.url} is healthy again.")
+
+        endpoint.consecutive_failures = 0
+        endpoint.open_until = 0.0
+        endpoint.healthy = True
+
+    def record_failure(self, endpoint: LlamaEndpoint, reason: str) -> None:
+        endpoint.consecutive_failures += 1
+
+        if endpoint.consecutive_failures >= self.failure_threshold:
+            was_healthy = endpoint.healthy
+            endpoint.healthy = False
+            endpoint.open_until = time.monotonic() + self.cooldown_seconds
+
+            if was_healthy:
+                logger.warning(
+                    f"Ejecting llama-server {endpoint.url} for {self.cooldown_seconds}s "
+                    f"after {endpoint.consecutive_failures} failures ({reason})."
+                )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "url": endpoint.url,
+                "weight": endpoint.weight,
+                "outstanding": endpoint.outstanding,
+                "consecutive_failures": endpoint.consecutive_failures,
+                "available": endpoint.is_available(now),
+            }
+            for endpoint in self.endpoints
+        ]
+
+
+def parse_endpoints(spec: str) -> List[LlamaEndpoint]:
+    """
+    Parse "url|weight,url|weight" (weight optional) into endpoints.
+    """
+    endpoints = []
+
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+
+        url, _, weight = item.partition("|")
+        endpoints.append(LlamaEndpoint(url.strip(), float(weight) if weight.strip() else 1.0))
+
+    return endpoints
+
+
+_llama_pool: Optional[LlamaPool] = None
+
+
+def get_llama_pool() -> LlamaPool:
+    """
+    Return the process-wide llama-server pool built from LLAMA_SERVER_URLS or LLAMA_SERVER_URL.
+    """
+    global _llama_pool
+
+    if _llama_pool is None:
+        _llama_pool = LlamaPool(
+            parse_endpoints(config.LLAMA_SERVER_URLS or config.LLAMA_SERVER_URL or ""),
+            failure_threshold=config.LLAMA_CIRCUIT_FAILURE_THRESHOLD,
+            cooldown_seconds=config.LLAMA_CIRCUIT_COOLDOWN_SECONDS,
+            affinity_max_extra_outstanding=config.LLAMA_AFFINITY_MAX_EXTRA_OUTSTANDING,
+        )
+
+    return _llama_pool
@@ -0,0 +1,180 @@
+import logging
+from typing import Any, Dict, Optional
+
+import config
+from admission import get_limiter
+from metrics import Counter, register
+from routing import get_llama_pool
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+AUTO_SELECTIONS = register(
+    Counter(
+        "summarizer_auto_provider_selections_total",
+        "Providers chosen for use_local=auto requests.",
+        ["provider"],
+    )
+)
+
+
+class ProviderPerformance:
+    """
+    Recent prefill and decode speed of one provider, kept as moving averages.
+
+    Prefill speed is prompt tokens over time-to-first-token, so it also absorbs
+    network and queueing overhead on the provider's side.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        prefill_tokens_per_second: float,
+        decode_tokens_per_second: float,
+        alpha: float,
+    ):
+        self.provider = provider
+        self.prefill_tokens_per_second = max(prefill_tokens_per_second, 1e-6)
+        self.decode_tokens_per_second = max(decode_tokens_per_second, 1e-6)
+        self.alpha = min(max(alpha, 0.0), 1.0)
+        self.samples = 0
+
+    def _blend(self, current: float, observed: float) -> float:
+        # The first observation replaces the configured prior outright
+        if self.samples == 0:
+            return observed
+        return (1 - self.alpha) * current + self.alpha * observed
+
+    def record(
+        self, prompt_tokens: int, ttft_seconds: float, output_tokens: int, decode_seconds: float
+    ) -> None:
+        if prompt_tokens <= 0 or ttft_seconds <= 0:
+            return
+
+        self.prefill_tokens_per_second = self._blend(
+            self.prefill_tokens_per_second, prompt_tokens / ttft_seconds
+        )
+        if output_tokens > 0 and decode_seconds > 0:
+            self.decode_tokens_per_second = self._blend(
+                self.decode_tokens_per_second, output_tokens / decode_seconds
+            )
+        self.samples += 1
+
+    def estimate_seconds(self, prompt_tokens: int, output_tokens: int) -> float:
+        return (
+            prompt_tokens / self.prefill_tokens_per_second
+            + output_tokens / self.decode_tokens_per_second
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "samples": self.samples,
+            "prefill_tokens_per_second": round(self.prefill_tokens_per_second, 3),
+            "decode_tokens_per_second": round(self.decode_tokens_per_second, 3),
+        }
+
+
+_performance = {
+    "llama-server": ProviderPerformance(
+        "llama-server",
+        config.AUTO_LLAMA_PREFILL_TOKENS_PER_SECOND,
+        config.AUTO_LLAMA_DECODE_TOKENS_PER_SECOND,
+        config.AUTO_EWMA_ALPHA,
+    ),
+    "groq": ProviderPerformance(
+        "groq",
+        config.AUTO_GROQ_PREFILL_TOKENS_PER_SECOND,
+        config.AUTO_GROQ_DECODE_TOKENS_PER_SECOND,
+        config.AUTO_EWMA_ALPHA,
+    ),
+}
+
+
+def record_generation(
+    use_local: bool,
+    prompt_tokens: int,
+    ttft_seconds: float,
+    output_tokens: int,
+    decode_seconds: float,
+) -> None:
+    """
+    Feed one finished generation into the provider's moving averages.
+    """
+    performance = _performance[get_limiter(use_local).provider]
+    performance.record(prompt_tokens, ttft_seconds, output_tokens, decode_seconds)
+
+
+def _unavailable_reason(use_local: bool) -> Optional[str]:
+    if use_local:
+        llama_pool = get_llama_pool()
+        if not llama_pool.endpoints:
+            return "not configured"
+        if not llama_pool.has_available():
+            return "no healthy endpoint"
+    elif not (config.GROQ_API_KEY and config.GROQ_MODEL):
+        return "not configured"
+
+    if get_limiter(use_local).is_saturated():
+        return "saturated"
+    return None
+
+
+def _queue_seconds(use_local: bool, service_seconds: float) -> float:
+    # Expected wait for an admission slot, from the queue ahead and the average hold time
+    stats = get_limiter(use_local).stats()
+    ahead = stats["in_flight"] + stats["queued"] + 1 - stats["max_concurrency"]
+    if ahead <= 0:
+        return 0.0
+
+    hold_seconds = stats["hold_seconds_avg"] or service_seconds
+    return hold_seconds * ahead / stats["max_concurrency"]
+
+
+def choose_provider(prompt_tokens: int) -> bool:
+    """
+    Pick llama-server (True) or Groq (False) for a use_local="auto" request.
+
+    Each available provider's finish time is estimated from the prompt size,
+    its recent prefill and decode speed, and the wait for an admission slot.
+    llama-server wins unless Groq is faster by more than
+    AUTO_LOCAL_PREFERENCE_SECONDS. If neither is available, llama-server is
+    chosen when configured so the usual errors apply.
+    """
+    output_tokens = config.AUTO_EXPECTED_OUTPUT_TOKENS
+    candidates = {}
+    decision: Dict[str, Any] = {"prompt_tokens": prompt_tokens}
+
+    for use_local in (True, False):
+        provider = get_limiter(use_local).provider
+        reason = _unavailable_reason(use_local)
+
+        if reason is not None:
+            decision[provider] = {"available": False, "reason": reason}
+            continue
+
+        service_seconds = _performance[provider].estimate_seconds(prompt_tokens, output_tokens)
+        queue_seconds = _queue_seconds(use_local, service_seconds)
+        candidates[use_local] = queue_seconds + service_seconds
+        decision[provider] = {
+            "available": True,
+            "queue_seconds": round(queue_seconds, 3),
+            "estimate_seconds": round(queue_seconds + service_seconds, 3),
+        }
+
+    if True in candidates and False in candidates:
+        use_local = candidates[True] <= candidates[False] + config.AUTO_LOCAL_PREFERENCE_SECONDS
+    elif candidates:
+        use_local = next(iter(candidates))
+    else:
+        use_local = decision["llama-server"]["reason"] != "not configured"
+
+    decision["chosen"] = get_limiter(use_local).provider
+    AUTO_SELECTIONS.inc(provider=decision["chosen"])
+    logger.info(f"Auto provider selection: {decision}.")
+    return use_local
+
+
+def selection_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: performance.stats() for name, performance in _performance.items()}
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STREAM_MEDIA_TYPES = {
+    "text": "text/plain",
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+async def coalesce_chunks(
+    source: AsyncIterator[str], max_chars: int, max_delay_seconds: float
+) -> AsyncIterator[str]:
+    """
+    Batch small chunks into larger writes.
+
+    A batch is flushed once it reaches `max_chars` characters or has waited
+    `max_delay_seconds` since its first chunk. The very first chunk is sent
+    straight away so batching never delays time-to-first-token.
+    """
+    if max_chars <= 1 and max_delay_seconds <= 0:
+        async for chunk in source:
+            yield chunk
+        return
+
+    loop = asyncio.get_running_loop()
+    iterator = source.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    buffer = []
+    buffered_chars = 0
+    deadline = None
+    first = True
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+            if not done:
+                # Time-based flush; the pending read carries over to the next batch
+                yield "".join(buffer)
+                buffer, buffered_chars, deadline = [], 0, None
+                continue
+
+            next_chunk, pending = pending, None
+            try:
+                chunk = next_chunk.result()
+            except StopAsyncIteration:
+                break
+            except Exception:
+                # Deliver what was produced before the failure
+                if buffer:
+                    yield "".join(buffer)
+                raise
+
+            if first:
+                first = False
+                yield chunk
+                continue
+
+            buffer.append(chunk)
+            buffered_chars += len(chunk)
+            if deadline is None:
+                deadline = loop.time() + max(0.0, max_delay_seconds)
+
+            if max_chars > 0 and buffered_chars >= max_chars:
+                yield "".join(buffer)
+                buffer, buffered_chars, deadline = [], 0, None
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        elif hasattr(iterator, "aclose"):
+            await iterator.aclose()
+
+
+async def stop_on_disconnect(
+    source: AsyncIterator[str],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_interval_seconds: float,
+) -> AsyncIterator[str]:
+    """
+    Pass chunks through, ending the stream as soon as the client disconnects.
+
+    The client is checked every `poll_interval_seconds` while waiting for the
+    next chunk, so a disconnect is noticed even when nothing is being written,
+    such as during a long prefill.
+    """
+    if poll_interval_seconds <= 0:
+        async for chunk in source:
+            yield chunk
+        return
+
+    iterator = source.__aiter__()
+    pending: Optional[asyncio.Future] = None
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+
+            done, _ = await asyncio.wait({pending}, timeout=poll_interval_seconds)
+
+            if not done:
+                if await is_disconnected():
+                    logger.info("Client disconnected; closing its stream.")
+                    return
+                continue
+
+            next_chunk, pending = pending, None
+            try:
+                chunk = next_chunk.result()
+            except StopAsyncIteration:
+                return
+
+            yield chunk
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
+
+
+def _ndjson_frame(frame: dict) -> str:
+    return json.dumps(frame, ensure_ascii=False) + "\n"
+
+
+def _sse_frame(frame: dict) -> str:
+    payload = {key: value for key, value in frame.items() if key not in ("seq", "type")}
+    return (
+        f"id: {frame['seq']}\n"
+        f"event: {frame['type']}\n"
+        f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+    )
+
+
+async def frame_stream(
+    source: AsyncIterator[str], stream_format: str, **stats
+) -> AsyncIterator[str]:
+    """
+    Wrap text chunks in NDJSON or SSE frames.
+
+    Every frame carries a sequence number. Text arrives in "delta" frames, and
+    the stream ends with a "done" frame holding stats, or an "error" frame if
+    generation failed, so clients can tell a clean finish from a cut-off stream.
+    Extra keyword arguments are added to the stats.
+    """
+    if stream_format == "text":
+        async for chunk in source:
+            yield chunk
+        return
+
+    encode = _sse_frame if stream_format == "sse" else _ndjson_frame
+    started = time.monotonic()
+    first_chunk_seconds = None
+    seq = 0
+    chars = 0
+
+    try:
+        async for chunk in source:
+            if first_chunk_seconds is None:
+                first_chunk_seconds = time.monotonic() - started
+
+            chars += len(chunk)
+            yield encode({"seq": seq, "type": "delta", "text": chunk})
+            seq += 1
+    except Exception as e:
+        logger.error(f"Framed stream failed: {e}")
+        yield encode({"seq": seq, "type": "error", "error": str(e)})
+        return
+
+    yield encode(
+        {
+            "seq": seq,
+            "type": "done",
+            "stats": {
+                **stats,
+                "frames": seq,
+                "chars": chars,
+                "first_chunk_seconds": (
+                    round(first_chunk_seconds, 4) if first_chunk_seconds is not None else None
+                ),
+                "elapsed_seconds": round(time.monotonic() - started, 4),
+            },
+        }
+    )
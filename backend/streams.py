@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from cache import MemoryCache
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StreamBroadcast:
+    """
+    Fan one producer's chunks out to any number of subscribers.
+
+    Subscribers get every chunk already produced followed by the live tail. The
+    producer is cancelled once the last subscriber has been gone for
+    `detach_grace_seconds` before it finishes, so a client can reconnect.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        source: AsyncIterator[str],
+        detach_grace_seconds: float = 0.0,
+        group: Optional[str] = None,
+    ):
+        self.key = key
+        self.group = group
+        self.stream_id = uuid.uuid4().hex
+        self.detach_grace_seconds = detach_grace_seconds
+        self.chunks: List[str] = []
+        self.done = False
+        self.cancelled = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        # Set while every subscriber that joined has left; cleared when one rejoins
+        self.detached = False
+        self.detached_at = 0.0
+        self._grace_timer: Optional[asyncio.TimerHandle] = None
+        self._changed = asyncio.Event()
+        self._done_callbacks: List[Callable[["StreamBroadcast"], None]] = []
+        self._task = asyncio.ensure_future(self._produce(source))
+
+    async def _produce(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except asyncio.CancelledError as e:
+            self.error = e
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._stop_grace_timer()
+            self._notify()
+
+            for callback in self._done_callbacks:
+                callback(self)
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def add_done_callback(self, callback: Callable[["StreamBroadcast"], None]) -> None:
+        if self.done:
+            callback(self)
+        else:
+            self._done_callbacks.append(callback)
+
+    def cancel(self) -> None:
+        if not self.done and not self.cancelled:
+            self.cancelled = True
+            self._task.cancel()
+
+    def _stop_grace_timer(self) -> None:
+        if self._grace_timer is not None:
+            self._grace_timer.cancel()
+            self._grace_timer = None
+
+    def _cancel_if_abandoned(self) -> None:
+        self._grace_timer = None
+        if self.detached and not self.done:
+            logger.info(f"All subscribers left {self.key}; cancelling generation.")
+            self.cancel()
+
+    def __sizeof__(self) -> int:
+        # Lets MemoryCache budget retained streams by the text they hold
+        return sum(len(chunk) for chunk in self.chunks) + 256
+
+    async def subscribe(self, offset: int = 0) -> AsyncIterator[str]:
+        """
+        Yield the stream from character `offset` onwards until the producer finishes.
+        """
+        self.subscribers += 1
+        self.detached = False
+        # A rejoining client restarts the grace period the next time everyone leaves
+        self._stop_grace_timer()
+        index = 0
+        skip = max(0, offset)
+
+        try:
+            while True:
+                changed = self._changed
+
+                if index < len(self.chunks):
+                    chunk = self.chunks[index]
+                    index += 1
+
+                    # Skip text the subscriber already has, splitting a chunk if needed
+                    if skip >= len(chunk):
+                        skip -= len(chunk)
+                        continue
+                    chunk, skip = chunk[skip:], 0
+
+                    yield chunk
+                    continue
+
+                if self.done:
+                    if self.error is not None:
+                        raise Exception(f"Summary stream failed: {self.error}")
+                    return
+
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+
+            if self.subscribers == 0 and not self.done:
+                self.detached = True
+                self.detached_at = time.monotonic()
+                self._stop_grace_timer()
+                if self.detach_grace_seconds > 0:
+                    self._grace_timer = asyncio.get_running_loop().call_later(
+                        self.detach_grace_seconds, self._cancel_if_abandoned
+                    )
+                else:
+                    self._cancel_if_abandoned()
+
+
+class SingleFlight:
+    """
+    Registry of in-flight broadcasts so identical requests share one generation.
+
+    Broadcasts can also be looked up by stream ID, and completed ones are kept
+    for a while so clients can resume a stream they were disconnected from.
+    """
+
+    def __init__(
+        self,
+        detach_grace_seconds: float = 0.0,
+        retention_seconds: float = 0.0,
+        retention_max_entries: int = 0,
+        retention_max_bytes: int = 0,
+    ):
+        self.detach_grace_seconds = detach_grace_seconds
+        self._flights: Dict[str, StreamBroadcast] = {}
+        self._streams: Dict[str, StreamBroadcast] = {}
+        self._finished = MemoryCache(
+            max_entries=retention_max_entries if retention_seconds > 0 else 0,
+            ttl_seconds=retention_seconds,
+            max_bytes=retention_max_bytes,
+        )
+
+    def get(self, key: str) -> Optional[StreamBroadcast]:
+        flight = self._flights.get(key)
+        if flight is None or flight.done or flight.cancelled:
+            return None
+        return flight
+
+    def get_or_start(
+        self,
+        key: str,
+        source_factory: Callable[[], AsyncIterator[str]],
+        group: Optional[str] = None,
+    ) -> StreamBroadcast:
+        flight = self.get(key)
+        if flight is not None:
+            return flight
+
+        flight = StreamBroadcast(key, source_factory(), self.detach_grace_seconds, group)
+        self._flights[key] = flight
+        self._streams[flight.stream_id] = flight
+        flight.add_done_callback(self._forget)
+        return flight
+
+    def get_stream(self, stream_id: str) -> Optional[StreamBroadcast]:
+        """
+        Return the running or recently completed broadcast with this stream ID.
+        """
+        return self._streams.get(stream_id) or self._finished.get(stream_id)
+
+    def cancel_detached(self, group: Optional[str] = None, count: int = 1) -> int:
+        """
+        Cancel up to `count` running broadcasts that every subscriber has left,
+        longest-detached first, without waiting out the detach grace period.
+        Returns how many were cancelled.
+        """
+        detached = sorted(
+            (
+                flight
+                for flight in self._flights.values()
+                if flight.detached
+                and not flight.done
+                and not flight.cancelled
+                and (group is None or flight.group == group)
+            ),
+            key=lambda flight: flight.detached_at,
+        )
+
+        for flight in detached[: max(0, count)]:
+            logger.info(f"Reclaiming detached generation {flight.key}.")
+            flight.cancel()
+
+        return min(len(detached), max(0, count))
+
+    def _forget(self, flight: StreamBroadcast) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        self._streams.pop(flight.stream_id, None)
+
+        # Only complete streams are worth resuming; failed ones would just replay the error
+        if flight.error is None:
+            self._finished.set(flight.stream_id, flight)
+
+    def __len__(self) -> int:
+        return len(self._flights)
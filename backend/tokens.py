@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import math
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+import tiktoken
+
+from cache import MemoryCache
+import config
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRIM_MARKER = " [...] "
+
+# Token counts keyed by a hash of the text, so unchanged text is never re-encoded
+_token_counts = MemoryCache(max_entries=config.TOKEN_COUNT_CACHE_ENTRIES, ttl_seconds=0)
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    """
+    Load the tokenizer once per process.
+    """
+    return tiktoken.get_encoding(config.TOKENIZER_ENCODING)
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens with the shared encoder, reusing counts for text seen before.
+    """
+    if not text:
+        return 0
+
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    count = _token_counts.get(key)
+
+    if count is None:
+        count = len(get_encoding().encode(text))
+        _token_counts.set(key, count)
+
+    return count
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the serving model's token count from the local encoder's count.
+    """
+    return int(math.ceil(count_tokens(text) * config.TOKEN_COUNT_SCALE))
+
+
+def context_limit(use_local: bool) -> int:
+    return config.LLAMA_CONTEXT_TOKENS if use_local else config.GROQ_CONTEXT_TOKENS
+
+
+def output_reserve(use_local: bool) -> int:
+    return config.LLAMA_MAX_OUTPUT_TOKENS if use_local else config.GROQ_MAX_COMPLETION_TOKENS
+
+
+def plan_prompt_budget(
+    template: str, transcript: str, use_local: bool, **fields: Any
+) -> Dict[str, Any]:
+    """
+    Work out how many prompt tokens a transcript needs and how many the backend allows.
+    """
+    overhead_tokens = estimate_tokens(template) + sum(
+        estimate_tokens(str(value)) for value in fields.values()
+    )
+    transcript_tokens = estimate_tokens(transcript)
+    limit = context_limit(use_local)
+    reserve = output_reserve(use_local)
+    available = max(0, limit - reserve)
+
+    return {
+        "provider": "llama-server" if use_local else "groq",
+        "context_limit": limit,
+        "output_reserve": reserve,
+        "available_prompt_tokens": available,
+        "overhead_tokens": overhead_tokens,
+        "transcript_tokens": transcript_tokens,
+        "prompt_tokens": overhead_tokens + transcript_tokens,
+        "fits": overhead_tokens + transcript_tokens <= available,
+        "trimmed": False,
+    }
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text down to roughly `max_tokens` estimated tokens, keeping its start and end.
+    """
+    if max_tokens <= 0:
+        return ""
+
+    encoding = get_encoding()
+    tokens = encoding.encode(text)
+    raw_budget = int(max_tokens / config.TOKEN_COUNT_SCALE)
+
+    if len(tokens) <= raw_budget:
+        return text
+
+    # Openings and conclusions carry most of a video's framing, so drop the middle
+    marker_tokens = len(encoding.encode(TRIM_MARKER))
+    keep = max(0, raw_budget - marker_tokens)
+    head = (keep * 2) // 3
+    tail = keep - head
+
+    trimmed = encoding.decode(tokens[:head]).rstrip()
+    if tail:
+        trimmed += TRIM_MARKER + encoding.decode(tokens[-tail:]).lstrip()
+    return trimmed
+
+
+def fit_transcript(
+    template: str, transcript: str, use_local: bool, **fields: Any
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Trim a transcript so the filled prompt fits the backend's context window.
+
+    Returns the (possibly trimmed) transcript and the budget that was applied.
+    Raises ValueError when the prompt cannot fit even without a transcript.
+    """
+    budget = plan_prompt_budget(template, transcript, use_local, **fields)
+
+    if budget["fits"]:
+        return transcript, budget
+
+    allowed = budget["available_prompt_tokens"] - budget["overhead_tokens"]
+    if allowed <= 0:
+        raise ValueError(
+            f"Prompt needs {budget['overhead_tokens']} tokens before the transcript; "
+            f"{budget['provider']} allows {budget['available_prompt_tokens']}."
+        )
+
+    trimmed = trim_to_tokens(transcript, allowed)
+    budget["transcript_tokens"] = estimate_tokens(trimmed)
+    budget["prompt_tokens"] = budget["overhead_tokens"] + budget["transcript_tokens"]
+    budget["fits"] = True
+    budget["trimmed"] = True
+
+    logger.warning(
+        f"Transcript trimmed to fit {budget['provider']} context "
+        f"({budget['prompt_tokens']}/{budget['available_prompt_tokens']} prompt tokens)."
+    )
+    return trimmed, budget
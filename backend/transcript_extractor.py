@@ -1,16 +1,96 @@
+import asyncio
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, parse_qs
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+from requests import Session
+from requests.adapters import HTTPAdapter
 from youtube_transcript_api import (
     YouTubeTranscriptApi,
     TranscriptsDisabled,
     NoTranscriptFound,
 )
+from cache import MemoryCache
+from compaction import compact_transcript
+from metrics import CACHE_REQUESTS, METADATA_FETCH_SECONDS, TRANSCRIPT_FETCH_SECONDS
+import config
 
 # Set up basic logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Transcripts and metadata share one memory budget; each kind sets its own TTL
+_context_cache = MemoryCache(
+    max_entries=config.CONTEXT_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.TRANSCRIPT_CACHE_TTL_SECONDS,
+    max_bytes=config.CONTEXT_CACHE_MAX_BYTES,
+)
+
+# Bounded pool for the blocking yt-dlp and transcript calls made by the async API
+_extract_executor = ThreadPoolExecutor(
+    max_workers=config.EXTRACT_MAX_WORKERS, thread_name_prefix="extract"
+)
+
+# Transcript clients and their sessions are not thread-safe, so each extraction thread
+# keeps its own; all of them share one pooled HTTP adapter
+_transcript_clients = threading.local()
+_transcript_adapter: Optional["_TimeoutHTTPAdapter"] = None
+_transcript_adapter_lock = threading.Lock()
+
+# YoutubeDL is not thread-safe, so each extraction thread keeps its own instances
+_youtube_dl = threading.local()
+
+_FULL_METADATA_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+}
+
+# Skip the watch page, player JS and stream manifests; title, channel and duration
+# all come from the player response
+_FAST_METADATA_OPTS = {
+    **_FULL_METADATA_OPTS,
+    "check_formats": False,
+    "extractor_args": {
+        "youtube": {
+            "player_skip": ["webpage", "configs", "js", "initial_data"],
+            "skip": ["hls", "dash", "translated_subs"],
+        }
+    },
+}
+
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    Pooled HTTP adapter that applies a default timeout to every request.
+    """
+
+    def __init__(self, timeout, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class _CachedFailure:
+    """
+    Negative cache entry recording why a fetch failed.
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+class _TranscriptUnavailable(ValueError):
+    """
+    Raised when YouTube reports that no usable transcript exists for a video.
+    """
+
 
 def extract_video_id(video_url: str) -> str:
     """
@@ -31,62 +111,229 @@ def get_transcript(video_url: str) -> str:
     """
     Fetch and return the transcript text for a given YouTube video URL.
     """
-    languages = ["en"]
     video_id = extract_video_id(video_url)
-    ytt_api = YouTubeTranscriptApi()
+    cache_key = f"transcript:{video_id}"
+
+    cached = _context_cache.get(cache_key)
+    if isinstance(cached, _CachedFailure):
+        raise ValueError(cached.message)
+    if cached is not None:
+        logger.info(f"Transcript cache hit for {video_id}.")
+        CACHE_REQUESTS.inc(cache="transcript", result="hit")
+        return cached
+
+    CACHE_REQUESTS.inc(cache="transcript", result="miss")
+    started = time.monotonic()
 
     try:
-        fetched_transcript = ytt_api.fetch(video_id, languages=languages)
-    except (TranscriptsDisabled, NoTranscriptFound):
-        transcript_search = ytt_api.list(video_id)
+        cues = _fetch_transcript(video_id)
+    except _TranscriptUnavailable as e:
+        TRANSCRIPT_FETCH_SECONDS.observe(time.monotonic() - started, outcome="unavailable")
+        _context_cache.set(
+            cache_key, _CachedFailure(str(e)), ttl_seconds=config.NEGATIVE_CACHE_TTL_SECONDS
+        )
+        raise
+    except ValueError as e:
+        TRANSCRIPT_FETCH_SECONDS.observe(time.monotonic() - started, outcome="error")
+        _context_cache.set(
+            cache_key,
+            _CachedFailure(str(e)),
+            ttl_seconds=config.TRANSIENT_ERROR_CACHE_TTL_SECONDS,
+        )
+        raise
+
+    TRANSCRIPT_FETCH_SECONDS.observe(time.monotonic() - started, outcome="ok")
+
+    # Compacted once per fetch, so cache hits skip it too
+    transcript_text, _ = compact_transcript(cues, video_id)
+    _context_cache.set(
+        cache_key, transcript_text, ttl_seconds=config.TRANSCRIPT_CACHE_TTL_SECONDS
+    )
+    return transcript_text
+
+
+def _get_transcript_adapter() -> _TimeoutHTTPAdapter:
+    """
+    Return the HTTP adapter whose keep-alive connection pool every transcript session uses.
+    """
+    global _transcript_adapter
+
+    with _transcript_adapter_lock:
+        if _transcript_adapter is None:
+            _transcript_adapter = _TimeoutHTTPAdapter(
+                timeout=(
+                    config.TRANSCRIPT_HTTP_CONNECT_TIMEOUT_SECONDS,
+                    config.TRANSCRIPT_HTTP_READ_TIMEOUT_SECONDS,
+                ),
+                pool_maxsize=config.TRANSCRIPT_HTTP_POOL_SIZE,
+            )
+
+    return _transcript_adapter
+
+
+def _get_transcript_api() -> YouTubeTranscriptApi:
+    """
+    Return this thread's transcript client, with its own session on the shared adapter.
+    """
+    transcript_api = getattr(_transcript_clients, "api", None)
+
+    if transcript_api is None:
+        adapter = _get_transcript_adapter()
+        session = Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        transcript_api = YouTubeTranscriptApi(http_client=session)
+        _transcript_clients.api = transcript_api
+
+    return transcript_api
+
+
+def _fetch_transcript(video_id: str) -> List[str]:
+    """
+    Fetch a video's English caption cues, in order.
+    """
+    languages = ["en"]
+
+    try:
+        # One listing covers both kinds; a manual transcript is preferred over a generated one
+        transcript_list = _get_transcript_api().list(video_id)
 
         try:
-            generated_transcript = transcript_search.find_generated_transcript(languages)
-            fetched_transcript = generated_transcript.fetch()
+            transcript = transcript_list.find_manually_created_transcript(languages)
         except NoTranscriptFound:
-            raise ValueError("Transcript not available for this video.")
+            transcript = transcript_list.find_generated_transcript(languages)
+            logger.info(f"Using generated transcript for {video_id}.")
+
+        fetched_transcript = transcript.fetch()
+    except (TranscriptsDisabled, NoTranscriptFound) as e:
+        raise _TranscriptUnavailable("Transcript not available for this video.") from e
     except Exception as e:
         raise ValueError("An error occurred while fetching the transcript.") from e
 
-    transcript_text = " ".join(snippet.text for snippet in fetched_transcript)
-    return transcript_text
+    return [snippet.text for snippet in fetched_transcript]
 
 
 def get_video_metadata(video_url: str) -> Dict[str, Any]:
     """
     Fetch basic YouTube metadata for a given video URL.
     """
+    try:
+        video_id = extract_video_id(video_url)
+    except ValueError:
+        return _fetch_video_metadata(video_url)
+
+    cache_key = f"metadata:{video_id}"
+    cached = _context_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Metadata cache hit for {video_id}.")
+        CACHE_REQUESTS.inc(cache="metadata", result="hit")
+        return dict(cached)
+
+    CACHE_REQUESTS.inc(cache="metadata", result="miss")
+    started = time.monotonic()
+    metadata = _fetch_video_metadata(video_url)
+
+    # An empty result means the lookup failed; keep it only briefly
+    if metadata.get("title") or metadata.get("channel") or metadata.get("duration_seconds"):
+        ttl_seconds = config.METADATA_CACHE_TTL_SECONDS
+        outcome = "ok"
+    else:
+        ttl_seconds = config.NEGATIVE_CACHE_TTL_SECONDS
+        outcome = "empty"
+
+    METADATA_FETCH_SECONDS.observe(time.monotonic() - started, outcome=outcome)
+
+    _context_cache.set(cache_key, dict(metadata), ttl_seconds=ttl_seconds)
+    return metadata
+
+
+def _get_youtube_dl(yt_dlp, fast: bool):
+    """
+    Return this thread's reusable YoutubeDL for the fast or full metadata path.
+    """
+    name = "fast" if fast else "full"
+    ydl = getattr(_youtube_dl, name, None)
+
+    if ydl is None:
+        ydl = yt_dlp.YoutubeDL(_FAST_METADATA_OPTS if fast else _FULL_METADATA_OPTS)
+        setattr(_youtube_dl, name, ydl)
+
+    return ydl
+
+
+def _metadata_from_info(info: Dict[str, Any]) -> Dict[str, Any]:
+    title = info.get("title") or ""
+    channel = (
+        info.get("uploader")
+        or info.get("channel")
+        or info.get("uploader_id")
+        or info.get("channel_id")
+        or ""
+    )
+    duration_seconds = int(info.get("duration") or 0)
+
+    # Normalize if the "channel" field ended up being non-string
+    if not isinstance(channel, str):
+        channel = str(channel)
+
+    return {"title": title, "channel": channel, "duration_seconds": duration_seconds}
+
+
+def _fetch_video_metadata_fast(yt_dlp, video_url: str) -> Optional[Dict[str, Any]]:
+    """
+    Read metadata without resolving formats. Returns None if a field is missing.
+    """
+    ydl = _get_youtube_dl(yt_dlp, fast=True)
+    info = ydl.extract_info(str(video_url), download=False, process=False) or {}
+    metadata = _metadata_from_info(info)
+
+    # Live and upcoming streams legitimately have no duration
+    has_duration = info.get("duration") is not None or info.get("live_status") in (
+        "is_live",
+        "is_upcoming",
+    )
+    if not (metadata["title"] and metadata["channel"] and has_duration):
+        return None
+
+    return metadata
+
+
+def _fetch_video_metadata_full(yt_dlp, video_url: str) -> Dict[str, Any]:
+    ydl = _get_youtube_dl(yt_dlp, fast=False)
+    return _metadata_from_info(ydl.extract_info(str(video_url), download=False) or {})
+
+
+def _load_metadata_extractor() -> None:
+    import yt_dlp  # type: ignore
+
+    _get_youtube_dl(yt_dlp, fast=config.METADATA_FAST_MODE).get_info_extractor("Youtube")
+
+
+async def warm_up_metadata_extractor() -> None:
+    """
+    Import yt-dlp and load its YouTube extractor on an extraction thread.
+    """
+    await asyncio.get_running_loop().run_in_executor(_extract_executor, _load_metadata_extractor)
+
+
+def _fetch_video_metadata(video_url: str) -> Dict[str, Any]:
     try:
         import yt_dlp  # type: ignore
     except Exception as e:
         logger.warning("yt-dlp unavailable; skipping metadata fetch (%s).", e)
         return {"title": "", "channel": "", "duration_seconds": 0}
 
-    ydl_opts = {
-        "quiet": True,
-        "no_warnings": True,
-        "skip_download": True,
-    }
+    if config.METADATA_FAST_MODE:
+        try:
+            metadata = _fetch_video_metadata_fast(yt_dlp, video_url)
+            if metadata is not None:
+                return metadata
+            logger.info("Fast metadata lookup missed fields; using the full extractor.")
+        except Exception as e:
+            logger.info("Fast metadata lookup failed; using the full extractor (%s).", e)
 
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(str(video_url), download=False) or {}
-
-        title = info.get("title") or ""
-        channel = (
-            info.get("uploader")
-            or info.get("channel")
-            or info.get("uploader_id")
-            or info.get("channel_id")
-            or ""
-        )
-        duration_seconds = int(info.get("duration") or 0)
-
-        # Normalize if the "channel" field ended up being non-string
-        if not isinstance(channel, str):
-            channel = str(channel)
-
-        return {"title": title, "channel": channel, "duration_seconds": duration_seconds}
+        return _fetch_video_metadata_full(yt_dlp, video_url)
     except Exception as e:
         logger.warning("Failed to fetch video metadata; proceeding without it (%s).", e)
         return {"title": "", "channel": "", "duration_seconds": 0}
@@ -99,3 +346,38 @@ def get_video_context(video_url: str) -> Dict[str, Any]:
     metadata = get_video_metadata(video_url)
     transcript = get_transcript(video_url)
     return {**metadata, "transcript": transcript}
+
+
+async def get_video_context_async(video_url: str) -> Dict[str, Any]:
+    """
+    Fetch transcript and metadata concurrently without blocking the event loop.
+
+    Metadata is optional: if it fails or misses its deadline the transcript is
+    returned with empty metadata. A transcript timeout raises ValueError.
+    """
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+
+    metadata_future = loop.run_in_executor(_extract_executor, get_video_metadata, video_url)
+    transcript_future = loop.run_in_executor(_extract_executor, get_transcript, video_url)
+
+    try:
+        transcript = await asyncio.wait_for(
+            transcript_future, timeout=config.TRANSCRIPT_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        metadata_future.cancel()
+        raise ValueError("Timed out while fetching the transcript.")
+    except BaseException:
+        metadata_future.cancel()
+        raise
+
+    remaining = config.METADATA_TIMEOUT_SECONDS - (time.monotonic() - started)
+
+    try:
+        metadata = await asyncio.wait_for(metadata_future, timeout=max(0.0, remaining))
+    except asyncio.TimeoutError:
+        logger.warning("Metadata fetch timed out; proceeding without it.")
+        metadata = {"title": "", "channel": "", "duration_seconds": 0}
+
+    return {**metadata, "transcript": transcript}
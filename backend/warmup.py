@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+import config
+from inference import warm_up_groq, warm_up_llama_endpoints
+from prompts import build_prompt, load_prompt_template
+from routing import get_llama_pool
+from tokens import count_tokens
+from transcript_extractor import warm_up_metadata_extractor
+
+# Set up basic logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WARMUP_TRANSCRIPT = "This is a short warm-up transcript used to prepare the service."
+
+_state: Dict[str, Any] = {
+    "ready": False,
+    "started_at": None,
+    "finished_at": None,
+    "components": {},
+}
+
+
+def readiness() -> Dict[str, Any]:
+    """
+    Return whether warm-up has finished along with each component's result.
+    """
+    return {
+        "ready": _state["ready"],
+        "warmup_seconds": (
+            round(_state["finished_at"] - _state["started_at"], 3)
+            if _state["finished_at"] is not None
+            else None
+        ),
+        "components": dict(_state["components"]),
+    }
+
+
+async def _run_step(name: str, step: Callable[[], Awaitable[Any]]) -> bool:
+    started = time.monotonic()
+
+    try:
+        result = await asyncio.wait_for(step(), timeout=config.WARMUP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        status, ok = "failed: timed out", False
+    except Exception as e:
+        status, ok = f"failed: {e}", False
+    else:
+        status, ok = "ok", True
+        # Steps that warm several targets report each one
+        if isinstance(result, dict):
+            status = result
+            ok = all(value == "ok" for value in result.values())
+
+    _state["components"][name] = {
+        "status": status,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+    log = logger.info if ok else logger.warning
+    log(f"Warm-up {name}: {status}.")
+    return ok
+
+
+async def warm_up() -> None:
+    """
+    Preload the tokenizer, yt-dlp and inference clients, and send a warm-up
+    prompt to every configured backend, then mark the service ready.
+
+    Only the tokenizer and prompt template are required for readiness; an
+    unreachable inference backend is left to the health checks and fail-over.
+    """
+    _state["started_at"] = time.monotonic()
+
+    if not config.WARMUP_ENABLED:
+        _state.update(ready=True, finished_at=_state["started_at"])
+        return
+
+    loop = asyncio.get_running_loop()
+    template = {}
+
+    def load_tokenizer():
+        template["text"] = load_prompt_template()
+        return count_tokens(template["text"])
+
+    tokenizer_ready, _ = await asyncio.gather(
+        _run_step("tokenizer", lambda: loop.run_in_executor(None, load_tokenizer)),
+        _run_step("yt_dlp", warm_up_metadata_extractor),
+    )
+
+    if tokenizer_ready and config.WARMUP_INFERENCE_ENABLED:
+        prompt = build_prompt(
+            template["text"], _WARMUP_TRANSCRIPT, title="Warm-up", channel="", duration_seconds=0
+        )
+        steps = []
+
+        if get_llama_pool().endpoints:
+            steps.append(_run_step("llama-server", lambda: warm_up_llama_endpoints(prompt)))
+        if os.environ.get("GROQ_API_KEY", config.GROQ_API_KEY) and config.GROQ_MODEL:
+            steps.append(_run_step("groq", lambda: warm_up_groq(prompt)))
+
+        await asyncio.gather(*steps)
+
+    _state["finished_at"] = time.monotonic()
+    _state["ready"] = tokenizer_ready
+    logger.info(
+        f"Warm-up finished in {_state['finished_at'] - _state['started_at']:.2f}s "
+        f"({'ready' if tokenizer_ready else 'not ready'})."
+    )
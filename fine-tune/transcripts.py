@@ -1,56 +1,286 @@
-import argparse, json
+from __future__ import annotations
+import argparse, json, random, threading, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from youtube_transcript_api import YouTubeTranscriptApi
-import yt_dlp
-
-def fetch_metadata(video_id: str) -> dict:
-    url = f"https://www.youtube.com/watch?v={video_id}"
-    ydl_opts = {"quiet": True, "skip_download": True}
-
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(url, download=False)
-
-    return {
-        "video_id": video_id,
-        "title": info.get("title", ""),
-        "channel": info.get("uploader", ""),
-        "duration_seconds": int(info.get("duration") or 0),
-        "url": url,
-    }
-
-def fetch_transcript(video_id: str) -> list[dict]:
-    segments = YouTubeTranscriptApi.get_transcript(video_id)
-
-    return [
-        {
-            "start": float(s.get("start", 0.0)),
-            "duration": float(s.get("duration", 0.0)),
-            "text": (s.get("text") or "").replace("\n", " ").strip(),
+from typing import Callable
+
+class PermanentError(Exception):
+    """A failure that retrying will not fix (no transcript, private or removed video)."""
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` fetches per second with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+class YouTubeFetcher:
+    """Fetches metadata with yt-dlp and transcripts with youtube-transcript-api, one client set per thread."""
+
+    def __init__(self, languages: list[str]):
+        self.languages = languages
+        self.local = threading.local()
+
+    def clients(self):
+        if not hasattr(self.local, "ydl"):
+            import yt_dlp
+            from youtube_transcript_api import YouTubeTranscriptApi
+
+            self.local.ydl = yt_dlp.YoutubeDL({"quiet": True, "skip_download": True})
+            self.local.transcripts = YouTubeTranscriptApi()
+        return self.local.ydl, self.local.transcripts
+
+    def fetch_metadata(self, video_id: str) -> dict:
+        from yt_dlp.utils import DownloadError
+
+        url = f"https://www.youtube.com/watch?v={video_id}"
+        ydl, _ = self.clients()
+
+        try:
+            info = ydl.extract_info(url, download=False, process=False) or {}
+        except DownloadError as e:
+            message = str(e).lower()
+            if any(s in message for s in ("private video", "video unavailable", "has been removed")):
+                raise PermanentError(str(e)) from e
+            raise
+
+        return {
+            "video_id": video_id,
+            "title": info.get("title", ""),
+            "channel": info.get("uploader") or info.get("channel") or "",
+            "duration_seconds": int(info.get("duration") or 0),
+            "url": url,
         }
-        for s in segments
-        if (s.get("text") or "").strip()
-    ]
+
+    def fetch_transcript(self, video_id: str) -> list[dict]:
+        from youtube_transcript_api import (
+            InvalidVideoId, NoTranscriptFound, TranscriptsDisabled, VideoUnavailable,
+        )
+
+        _, transcripts = self.clients()
+
+        try:
+            segments = transcripts.fetch(video_id, languages=self.languages).to_raw_data()
+        except (InvalidVideoId, NoTranscriptFound, TranscriptsDisabled, VideoUnavailable) as e:
+            raise PermanentError(f"{type(e).__name__}: no transcript for {video_id}") from e
+
+        return [
+            {
+                "start": float(s.get("start", 0.0)),
+                "duration": float(s.get("duration", 0.0)),
+                "text": (s.get("text") or "").replace("\n", " ").strip(),
+            }
+            for s in segments
+            if (s.get("text") or "").strip()
+        ]
+
+    def __call__(self, video_id: str) -> dict:
+        meta = self.fetch_metadata(video_id)
+        return {**meta, "transcript_segments": self.fetch_transcript(video_id)}
+
+class FixtureFetcher:
+    """Serves rows from a JSONL file of previously crawled videos, for offline runs and tests."""
+
+    def __init__(self, path: str, latency: float = 0.0, fail_rate: float = 0.0, seed: int = 0):
+        self.rows = {row["video_id"]: row for row in read_jsonl(Path(path))}
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def __call__(self, video_id: str) -> dict:
+        time.sleep(self.latency)
+
+        with self.lock:
+            flaky = self.random.random() < self.fail_rate
+        if flaky:
+            raise ConnectionError(f"simulated transient failure for {video_id}")
+        if video_id not in self.rows:
+            raise PermanentError(f"{video_id} is not in the fixture file")
+
+        return dict(self.rows[video_id])
+
+def read_jsonl(path: Path) -> list[dict]:
+    rows = []
+    if not path.exists():
+        return rows
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return rows
+
+def load_checkpoint(out_path: Path) -> set[str]:
+    if not out_path.exists():
+        return set()
+
+    # A run killed mid-write can leave a partial last line; cut it so appends stay valid JSONL
+    data = out_path.read_bytes()
+    if data and not data.endswith(b"\n"):
+        with open(out_path, "r+b") as f:
+            f.truncate(data.rfind(b"\n") + 1)
+
+    return {row["video_id"] for row in read_jsonl(out_path) if row.get("video_id")}
+
+def read_video_ids(input_csv: str) -> list[str]:
+    with open(input_csv, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()[1:]
+
+    ids = [ln.split(",")[0].strip() for ln in lines if ln.strip() and not ln.startswith("#")]
+    return list(dict.fromkeys(ids))
+
+def fetch_with_retry(
+    fetch: Callable[[str], dict],
+    video_id: str,
+    bucket: TokenBucket,
+    max_attempts: int,
+    backoff_base: float,
+    backoff_max: float,
+) -> tuple[dict | None, dict | None]:
+    for attempt in range(1, max_attempts + 1):
+        bucket.acquire()
+
+        try:
+            return fetch(video_id), None
+        except Exception as e:
+            permanent = isinstance(e, PermanentError)
+            if permanent or attempt == max_attempts:
+                return None, {
+                    "video_id": video_id,
+                    "error": f"{type(e).__name__}: {e}",
+                    "permanent": permanent,
+                    "attempts": attempt,
+                    "failed_at": time.time(),
+                }
+
+            # Exponential backoff with full jitter
+            time.sleep(random.uniform(0, min(backoff_max, backoff_base * 2 ** (attempt - 1))))
+
+def crawl(
+    video_ids: list[str],
+    fetch: Callable[[str], dict],
+    out_path: Path,
+    failures_path: Path,
+    workers: int = 4,
+    rate: float = 2.0,
+    burst: int = 4,
+    max_attempts: int = 3,
+    backoff_base: float = 2.0,
+    backoff_max: float = 60.0,
+    skip_failed: bool = False,
+) -> dict:
+    done = load_checkpoint(out_path)
+    if skip_failed:
+        done |= {row["video_id"] for row in read_jsonl(failures_path) if row.get("permanent")}
+
+    todo = [vid for vid in video_ids if vid not in done]
+    stats = {"total": len(video_ids), "skipped": len(video_ids) - len(todo), "written": 0, "failed": 0}
+    bucket = TokenBucket(rate, burst)
+
+    with open(out_path, "a", encoding="utf-8") as w, open(failures_path, "a", encoding="utf-8") as fw:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [
+                pool.submit(fetch_with_retry, fetch, vid, bucket, max_attempts, backoff_base, backoff_max)
+                for vid in todo
+            ]
+
+            # Only this thread writes, one flushed line per video, so the output is the checkpoint
+            try:
+                for i, future in enumerate(as_completed(futures), 1):
+                    row, failure = future.result()
+
+                    if row is not None:
+                        w.write(json.dumps(row, ensure_ascii=False) + "\n")
+                        w.flush()
+                        stats["written"] += 1
+                    else:
+                        fw.write(json.dumps(failure, ensure_ascii=False) + "\n")
+                        fw.flush()
+                        stats["failed"] += 1
+                        print(f"Failed {failure['video_id']} after {failure['attempts']} attempt(s): {failure['error']}")
+
+                    if i % 50 == 0 or i == len(futures):
+                        print(f"Progress: {i}/{len(futures)} ({stats['written']} written, {stats['failed']} failed)")
+            except BaseException:
+                # On Ctrl-C, drop the queued fetches instead of running them with nowhere to write;
+                # a rerun picks up from the checkpoint
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    return stats
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--input_csv", required=True)
     ap.add_argument("--out_jsonl", required=True)
+    ap.add_argument("--failures_jsonl", default="", help="default: <out_jsonl>.failures.jsonl")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--rate", type=float, default=2.0, help="videos per second across all workers (0 = unlimited)")
+    ap.add_argument("--burst", type=int, default=4)
+    ap.add_argument("--max_attempts", type=int, default=3)
+    ap.add_argument("--backoff_base", type=float, default=2.0)
+    ap.add_argument("--backoff_max", type=float, default=60.0)
+    ap.add_argument("--skip_failed", action="store_true", help="skip IDs recorded as permanent failures")
+    ap.add_argument("--languages", default="en", help="comma-separated transcript languages, in preference order")
+    ap.add_argument("--fetcher", choices=["youtube", "fixture"], default="youtube")
+    ap.add_argument("--fixture_jsonl", default="", help="rows served by --fetcher fixture")
+    ap.add_argument("--fixture_latency", type=float, default=0.0)
+    ap.add_argument("--fixture_fail_rate", type=float, default=0.0)
     args = ap.parse_args()
 
     out_path = Path(args.out_jsonl)
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    failures_path = Path(args.failures_jsonl or f"{args.out_jsonl}.failures.jsonl")
 
-    with open(args.input_csv, "r", encoding="utf-8") as f:
-        video_ids = [ln.strip() for ln in f.read().splitlines()[1:] if ln.strip() and not ln.startswith("#")]
+    if args.fetcher == "fixture":
+        if not args.fixture_jsonl:
+            ap.error("--fetcher fixture needs --fixture_jsonl")
+        fetch = FixtureFetcher(args.fixture_jsonl, args.fixture_latency, args.fixture_fail_rate)
+    else:
+        fetch = YouTubeFetcher([lang.strip() for lang in args.languages.split(",") if lang.strip()])
 
-    with open(out_path, "w", encoding="utf-8") as w:
-        for vid in video_ids:
-            meta = fetch_metadata(vid)
-            transcript = fetch_transcript(vid)
-            row = {**meta, "transcript_segments": transcript}
-            w.write(json.dumps(row, ensure_ascii=False) + "\n")
+    started = time.monotonic()
+    stats = crawl(
+        read_video_ids(args.input_csv),
+        fetch,
+        out_path,
+        failures_path,
+        workers=args.workers,
+        rate=args.rate,
+        burst=args.burst,
+        max_attempts=args.max_attempts,
+        backoff_base=args.backoff_base,
+        backoff_max=args.backoff_max,
+        skip_failed=args.skip_failed,
+    )
 
-    print(f"Wrote {len(video_ids)} rows to {out_path}")
+    print(
+        f"Wrote {stats['written']} rows to {out_path} in {time.monotonic() - started:.1f}s "
+        f"({stats['skipped']} already done, {stats['failed']} failed, see {failures_path})"
+    )
 
 if __name__ == "__main__":
     main()